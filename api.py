@@ -0,0 +1,297 @@
+"""Read-only JSON API over the four person tables and their education aggregates.
+
+    flask --app api run                       # or: python api.py
+
+GET /api/<resource>             servants, politicians, officer_family, politician_family
+    ?after_id=<id>&limit=<n>    keyset pagination; follow next_after_id until it is null
+    &fields=name,university      only these columns
+    &department=IAS&education_location=USA   the dashboard's filters, repeatable
+    &joining_year=2019          servants and officer_family only, repeatable; pruned to
+                                those partitions when the tables are partitioned
+GET /api/<resource>/stats       headline metrics (see education_stats) for the same filters
+GET /api/servants/export?format=csv      the filtered people joined to their family members
+GET /api/politicians/export?format=xlsx  as a CSV, Parquet or XLSX download (see export.py)
+GET /api/versions               write counter and last write time per table
+
+Responses are streamed and carry an ETag and Last-Modified derived from the
+table_versions counters, so conditional requests get a 304 until the data
+behind them changes.
+"""
+import hashlib
+import json
+import tempfile
+from dataclasses import asdict
+from datetime import timezone
+
+import numpy as np
+from flask import Flask, Response, abort, jsonify, request, send_file, stream_with_context
+from sqlalchemy import func, select
+
+from database import (
+    SERVANTS_QUERY, SERVANT_COLUMNS, OFFICER_FAMILY_QUERY, OFFICER_FAMILY_COLUMNS,
+    POLITICIANS_QUERY, POLITICIAN_COLUMNS, POLITICIAN_FAMILY_QUERY, POLITICIAN_FAMILY_COLUMNS
+)
+from education_stats import stats_from_counts
+from export import EXPORTS, EXPORT_FORMATS, available_formats, write_export
+from lookups import load_lookup_names
+from models import (
+    PublicServant, Politician, PoliticianFamily, OfficerFamily, TableVersion, DEPENDENT_TABLES, VERSIONED_TABLES,
+    SessionLocal
+)
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 100000
+
+
+class Resource:
+    """One listable table: its loader query and the id columns each filter parameter matches"""
+
+    def __init__(self, model, query, columns, filters, year_columns=()):
+        self.model = model
+        self.query = query
+        self.columns = columns
+        self.filters = filters
+        # Columns a joining_year parameter restricts; every partitioned table in the query has one
+        self.year_columns = year_columns
+
+    @property
+    def tables(self):
+        # Family rows carry their parent's name and party/department, so they depend on both tables
+        parents = [parent for parent, child in DEPENDENT_TABLES.items() if child == self.model.__tablename__]
+        return [self.model.__tablename__, *parents]
+
+
+RESOURCES = {
+    'servants': Resource(PublicServant, SERVANTS_QUERY, SERVANT_COLUMNS, {
+        'department': PublicServant.department_id,
+        'education_location': PublicServant.education_location_id,
+        'degree_level': PublicServant.degree_level_id,
+    }, (PublicServant.joining_year,)),
+    'politicians': Resource(Politician, POLITICIANS_QUERY, POLITICIAN_COLUMNS, {
+        'party': Politician.party_id,
+        'position': Politician.position_id,
+        'education_location': Politician.education_location_id,
+        'degree_level': Politician.degree_level_id,
+    }),
+    'officer_family': Resource(OfficerFamily, OFFICER_FAMILY_QUERY, OFFICER_FAMILY_COLUMNS, {
+        'department': PublicServant.department_id,
+        'education_location': OfficerFamily.education_location_id,
+        'degree_level': OfficerFamily.degree_level_id,
+    }, (OfficerFamily.joining_year, PublicServant.joining_year)),
+    'politician_family': Resource(PoliticianFamily, POLITICIAN_FAMILY_QUERY, POLITICIAN_FAMILY_COLUMNS, {
+        'party': Politician.party_id,
+        'education_location': PoliticianFamily.education_location_id,
+        'degree_level': PoliticianFamily.degree_level_id,
+    }),
+}
+
+app = Flask(__name__)
+
+
+def _int_arg(name, default, minimum=0, maximum=None):
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        abort(400, f"{name} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        abort(400, f"{name} must be between {minimum} and {maximum}")
+    return value
+
+
+def _filter_conditions(resource, names):
+    """WHERE clauses for the filter parameters, matched against lookup names without a join"""
+    conditions = []
+    for param, column in resource.filters.items():
+        values = request.args.getlist(param)
+        if values:
+            wanted = set(values)
+            ids = [lookup_id for lookup_id, name in names[param].items() if name in wanted]
+            conditions.append(column.in_(ids))
+    years = request.args.getlist('joining_year')
+    if years and resource.year_columns:
+        if not all(year.isdigit() for year in years):
+            abort(400, "joining_year must be an integer")
+        conditions += [column.in_([int(year) for year in years]) for column in resource.year_columns]
+    return conditions
+
+
+def _versions(db, tables):
+    rows = db.execute(
+        select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.table_name.in_(tables))
+    ).all()
+    return {table: (version, updated_at) for table, version, updated_at in rows}
+
+
+def _utc(timestamp):
+    # SQLite hands DateTime(timezone=True) values back naive; they were written in UTC
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+def _conditional(db, tables):
+    """(ETag, Last-Modified) for the request, or a 304 Response if the client's copy is current"""
+    versions = _versions(db, tables)
+    key = json.dumps([request.path, sorted(request.args.items(multi=True)),
+                      [versions.get(table, (0, None))[0] for table in tables]])
+    etag = hashlib.sha1(key.encode()).hexdigest()
+    last_modified = max(
+        (_utc(updated_at) for _, updated_at in versions.values() if updated_at is not None), default=None
+    )
+
+    not_modified = Response(status=304)
+    not_modified.set_etag(etag)
+    if request.if_none_match:
+        if request.if_none_match.contains(etag):
+            return etag, last_modified, not_modified
+    elif last_modified and request.if_modified_since and last_modified.replace(microsecond=0) <= request.if_modified_since:
+        return etag, last_modified, not_modified
+    return etag, last_modified, None
+
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.get('/api/<resource_name>')
+def list_rows(resource_name):
+    resource = RESOURCES.get(resource_name) or abort(404, f"Unknown resource {resource_name}")
+    after_id = _int_arg('after_id', 0)
+    limit = _int_arg('limit', DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT)
+    fields = request.args.get('fields')
+    fields = fields.split(',') if fields else resource.columns
+    unknown = set(fields) - set(resource.columns)
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    db = SessionLocal()
+    try:
+        etag, last_modified, not_modified = _conditional(db, resource.tables)
+        if not_modified:
+            db.close()
+            return not_modified
+        names = load_lookup_names(db)
+        query = (resource.query
+                 .where(resource.model.id > after_id, *_filter_conditions(resource, names))
+                 .limit(limit)
+                 .execution_options(yield_per=1000))
+        result = db.execute(query)
+    except Exception:
+        db.close()
+        raise
+
+    positions = [resource.columns.index(field) for field in fields]
+    decoders = [names.get(field) for field in fields]
+
+    def generate():
+        yield '{"data": ['
+        last_id, count = None, 0
+        for rows in result.partitions():
+            records = [json.dumps({
+                field: (decoder.get(row[position]) if decoder is not None else row[position])
+                for field, position, decoder in zip(fields, positions, decoders)
+            }, default=str) for row in rows]
+            yield (',' if count else '') + ','.join(records)
+            last_id, count = rows[-1][0], count + len(rows)
+        next_after_id = last_id if count == limit else None
+        yield f'], "count": {count}, "next_after_id": {json.dumps(next_after_id)}}}'
+
+    response = Response(stream_with_context(generate()), mimetype='application/json')
+    # The server closes the response even if the body is never iterated, so the session can't leak
+    response.call_on_close(db.close)
+    return _with_validators(response, etag, last_modified)
+
+
+@app.get('/api/<resource_name>/stats')
+def resource_stats(resource_name):
+    resource = RESOURCES.get(resource_name) or abort(404, f"Unknown resource {resource_name}")
+    model = resource.model
+    db = SessionLocal()
+    try:
+        etag, last_modified, not_modified = _conditional(db, resource.tables)
+        if not_modified:
+            return not_modified
+        names = load_lookup_names(db)
+        # One GROUP BY over the id columns gives the location x degree table the metrics come from
+        base = resource.query.with_only_columns(
+            model.education_location_id, model.degree_level_id, func.count()
+        ).order_by(None).where(*_filter_conditions(resource, names))
+        counts = db.execute(base.group_by(model.education_location_id, model.degree_level_id)).all()
+    finally:
+        db.close()
+
+    locations = sorted(names['education_location'])
+    degrees = sorted(names['degree_level'])
+    location_index = {lookup_id: i + 1 for i, lookup_id in enumerate(locations)}
+    degree_index = {lookup_id: i + 1 for i, lookup_id in enumerate(degrees)}
+    table = np.zeros((len(locations) + 1, len(degrees) + 1), dtype=np.int64)
+    for location_id, degree_id, n in counts:
+        table[location_index.get(location_id, 0), degree_index.get(degree_id, 0)] += n
+    stats = stats_from_counts(
+        table,
+        [names['education_location'][i] for i in locations],
+        [names['degree_level'][i] for i in degrees],
+    )
+    response = jsonify({**asdict(stats), 'western_percentage': round(stats.western_percentage, 2)})
+    return _with_validators(response, etag, last_modified)
+
+
+@app.get('/api/<resource_name>/export')
+def export_rows(resource_name):
+    if resource_name not in EXPORTS:
+        abort(404, f"Exports cover {' and '.join(EXPORTS)}, with their family members")
+    export_format = request.args.get('format', 'csv')
+    if export_format not in available_formats():
+        abort(400, f"format must be one of {', '.join(available_formats())}")
+    export = EXPORTS[resource_name]
+    filters = {param: request.args.getlist(param) for param in export.filters if param in request.args}
+    if 'joining_year' in filters:
+        if not all(year.isdigit() for year in filters['joining_year']):
+            abort(400, "joining_year must be an integer")
+        filters['joining_year'] = [int(year) for year in filters['joining_year']]
+
+    db = SessionLocal()
+    try:
+        etag, last_modified, not_modified = _conditional(db, export.tables)
+    finally:
+        db.close()
+    if not_modified:
+        return not_modified
+    # Spool to disk, then send the file in blocks; neither step holds the whole export in memory
+    file = tempfile.TemporaryFile()
+    try:
+        write_export(resource_name, export_format, file, filters)
+        file.seek(0)
+    except Exception:
+        file.close()
+        raise
+    extension = EXPORT_FORMATS[export_format].extension
+    response = send_file(file, mimetype=EXPORT_FORMATS[export_format].mime_type, as_attachment=True,
+                         download_name=f"{resource_name}.{extension}", conditional=False, etag=False)
+    return _with_validators(response, etag, last_modified)
+
+
+@app.get('/api/versions')
+def versions():
+    db = SessionLocal()
+    try:
+        rows = _versions(db, VERSIONED_TABLES)
+    finally:
+        db.close()
+    return jsonify({
+        table: {'version': version, 'updated_at': _utc(updated_at).isoformat() if updated_at else None}
+        for table, (version, updated_at) in rows.items()
+    })
+
+
+@app.errorhandler(400)
+@app.errorhandler(404)
+def json_error(error):
+    return jsonify({'error': error.description}), error.code
+
+
+if __name__ == '__main__':
+    app.run()
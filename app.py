@@ -1,14 +1,30 @@
 import streamlit as st
 import pandas as pd
-from database import get_all_servants, get_all_politicians, add_servant, add_politician, seed_database, delete_politician, delete_servant, add_children_to_politician, check_politician_exists, add_children_to_officer
+from database import get_all_servants, get_all_politicians, add_servant, add_politician, is_database_ready, init_database, delete_politician, delete_servant, add_children_to_politician, check_politician_exists, add_children_to_officer, get_data_version, bulk_delete, get_import_batches, get_politician_children_in_civil_service
 from utils import (
-    create_education_distribution_chart,
-    create_yearly_trends,
-    create_department_education_heatmap,
-    get_western_education_stats
+    education_distribution_figure,
+    yearly_trends_figure,
+    department_heatmap_figure,
+    build_person_labels
 )
+from count_cube import CountCube, SERVANT_DIMENSIONS, POLITICIAN_DIMENSIONS, get_count_cube
 from data_integration import DataIntegrator
+from bulk_import import UPLOAD_KINDS, MIN_JOINING_YEAR, import_file
+from async_database import async_reads_available, load_all_sync
+from sampling import load_servant_sample
+from export import EXPORT_FORMATS, available_formats, write_export
+from search import search_people
+from profiling import begin_trace, span, trace_frame, get_stats
+from figure_cache import cached_figure, figure_cache
 import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,8 +36,23 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize database with seed data
-seed_database()
+# Collect query counts and timings for this rerun; shown in the profiler panel
+rerun_trace = begin_trace()
+DEBUG_MODE = os.getenv('TRACKER_DEBUG', '0') not in ('', '0') or st.query_params.get('debug') == '1'
+# Where browsers reach api.py; when set, exports download from it instead of through this process
+API_URL = os.getenv('TRACKER_API_URL', '').rstrip('/')
+# Without API_URL a download is held in memory whole, so larger exports are refused
+EXPORT_MAX_MB = float(os.getenv('TRACKER_EXPORT_MAX_MB', '50'))
+
+# Check the schema once per process; creating and seeding it is `python manage.py init`
+@st.cache_resource
+def ensure_database_ready():
+    if not is_database_ready():
+        logger.warning("Database not initialized; run `python manage.py init`. Initializing now.")
+        init_database()
+    return True
+
+ensure_database_ready()
 
 # Title and introduction
 st.title("🎓 Indian Public Service Education Tracker")
@@ -47,24 +78,255 @@ if st.sidebar.button("Collect New Data"):
         - {servants_count} civil servants added
         """)
 
-        # Clear the cache to reflect new data
+        # Clear the cache so load_data below picks up the new rows
         st.cache_data.clear()
-
-        # Reload the data
-        servants_df, officer_family_df, politicians_df, family_df = load_data()
     except Exception as e:
         st.sidebar.error(f"Error collecting data: {str(e)}")
         logger.error(f"Data collection error: {str(e)}")
 
+# Bulk upload of curated CSV or Parquet files
+st.sidebar.markdown("---")
+st.sidebar.header("📤 Bulk Upload")
+upload_kind = st.sidebar.selectbox(
+    "Record type",
+    list(UPLOAD_KINDS),
+    format_func=lambda kind: kind.replace('_', ' ').title(),
+    key="upload_kind"
+)
+st.sidebar.caption("Columns: " + ", ".join(UPLOAD_KINDS[upload_kind].columns))
+upload_file = st.sidebar.file_uploader("CSV or Parquet file", type=["csv", "parquet"], key="upload_file")
+if upload_file is not None and st.sidebar.button("Import file"):
+    progress_bar = st.sidebar.progress(0.0, text="Importing...")
+
+    def show_progress(rows_read, total_rows):
+        fraction = rows_read / total_rows if total_rows else 0.0
+        progress_bar.progress(min(fraction, 1.0), text=f"Read {rows_read:,} rows")
+
+    try:
+        report = import_file(upload_file, upload_kind, progress=show_progress)
+        progress_bar.progress(1.0, text=f"Read {report.rows:,} rows")
+        st.sidebar.success(f"Imported {report.inserted:,} of {report.rows:,} rows as batch {report.batch}")
+        if report.errors:
+            st.sidebar.warning(f"{len(report.errors):,} problems; those rows were skipped")
+            errors_df = report.errors_frame()
+            st.sidebar.dataframe(errors_df.head(200), hide_index=True)
+            st.sidebar.download_button(
+                "Download all errors",
+                errors_df.to_csv(index=False),
+                file_name=f"{report.batch}-errors.csv",
+                mime="text/csv"
+            )
+        st.cache_data.clear()
+    except Exception as e:
+        st.sidebar.error(f"Import failed: {str(e)}")
+        logger.error(f"Bulk import error: {str(e)}")
+
+# Search across officers, politicians and family members
+st.sidebar.markdown("---")
+st.sidebar.header("🔍 Search")
+search_query = st.sidebar.text_input("Name or university", key="search_query")
+if search_query:
+    search_results = search_people(search_query, limit=20)
+    if search_results.empty:
+        st.sidebar.info("No matches found")
+    else:
+        st.sidebar.dataframe(
+            search_results[['entity', 'name', 'university']],
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+# Above this many people the "add children" pickers list search matches instead of everyone
+PICKER_SEARCH_THRESHOLD = 500
+
+def picker_options(df, detail_column, entity, query):
+    """Option ids and their labels for an existing-person selectbox"""
+    if len(df) <= PICKER_SEARCH_THRESHOLD:
+        labels = build_person_labels(df, detail_column)
+        return list(labels), labels
+    if not query:
+        return [], {}
+    matched_ids = search_people(query, limit=50, entities=[entity])['id'].tolist()
+    labels = build_person_labels(df[df['id'].isin(matched_ids)], detail_column)
+    return [i for i in matched_ids if i in labels], labels
+
+
+def export_controls(name, filters):
+    """Sidebar download of the filtered people and their family members, streamed from the database"""
+    st.sidebar.markdown("---")
+    st.sidebar.header("📥 Export")
+    export_format = st.sidebar.selectbox("Format", available_formats(), format_func=str.upper,
+                                         key=f"export_format_{name}")
+    st.sidebar.caption("One row per family member, from the full tables even in fast preview")
+    if API_URL:
+        # The API streams the file from disk, so the export never passes through this process
+        params = [('format', export_format)] + [
+            (param, '' if pd.isna(value) else str(value))
+            for param, values in filters.items() if values is not None for value in values
+        ]
+        st.sidebar.link_button("Download", f"{API_URL}/api/{name}/export?{urlencode(params)}")
+        return
+    if st.sidebar.button("Prepare export", key=f"export_{name}"):
+        progress_text = st.sidebar.empty()
+        # Rows go from the database to a temporary file chunk by chunk, never into one DataFrame
+        with tempfile.TemporaryFile() as file:
+            rows = write_export(name, export_format, file, filters,
+                                progress=lambda written: progress_text.caption(f"Exported {written:,} rows..."))
+            size_mb = file.tell() / 2**20
+            progress_text.empty()
+            if size_mb > EXPORT_MAX_MB:
+                st.sidebar.error(f"The export is {size_mb:,.1f} MB, over the {EXPORT_MAX_MB:g} MB the dashboard "
+                                 f"serves itself. Set TRACKER_API_URL to download it from the API, or narrow the filters.")
+                return
+            file.seek(0)
+            file_format = EXPORT_FORMATS[export_format]
+            st.sidebar.download_button(
+                f"Download {rows:,} rows",
+                data=file.read(),
+                file_name=f"{name}.{file_format.extension}",
+                mime=file_format.mime_type,
+                key=f"export_download_{name}"
+            )
+
+
+# Load data, with the import batch and civil service crossover aggregates
+def load_exact_data(years=None):
+    # With an async driver installed the loader and aggregate queries run concurrently
+    if async_reads_available():
+        return load_all_sync(years)
+    servants, officer_family = get_all_servants(years)
+    politicians, family = get_all_politicians()
+    return (servants, officer_family, politicians, family,
+            get_import_batches(), get_politician_children_in_civil_service())
 
-# Load data
 @st.cache_data
-def load_data():
-    servants, officer_family = get_all_servants()
+def load_data(data_version, years=None):
+    return load_exact_data(years)
+
+@st.cache_data
+def load_preview_data(data_version, years=None):
     politicians, family = get_all_politicians()
-    return servants, officer_family, politicians, family
+    return (load_servant_sample(years=years), politicians, family,
+            get_import_batches(), get_politician_children_in_civil_service())
+
+# Exact loads kept per process, one per data version and year range; sessions on different ranges share them
+EXACT_LOADS_KEPT = 4
+# Seconds a failed exact load waits before the next attempt
+EXACT_LOAD_RETRY_S = float(os.getenv('TRACKER_EXACT_LOAD_RETRY_S', '30'))
+
+@st.cache_resource
+def exact_loads():
+    """Background exact loads shared by every session: the executor, {key: [future, retry_at]} and its lock"""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="exact-load"), OrderedDict(), threading.Lock()
+
+def exact_load(data_version, years=None):
+    executor, futures, lock = exact_loads()
+    key = (data_version, years)
+    # Sessions rerun concurrently; the lock keeps them from submitting the same load twice
+    with lock:
+        entry = futures.get(key)
+        if entry is not None:
+            futures.move_to_end(key)
+            future, retry_at = entry
+            if not future.done() or future.exception() is None:
+                return future
+            if retry_at is None:
+                # A failed load (say, a dropped connection) is retried after a delay, not on every rerun
+                logger.warning(f"Background exact load failed, retrying in {EXACT_LOAD_RETRY_S:g}s: {future.exception()}")
+                entry[1] = time.monotonic() + EXACT_LOAD_RETRY_S
+                return future
+            if time.monotonic() < retry_at:
+                return future
+        futures[key] = [executor.submit(load_exact_data, years), None]
+        while len(futures) > EXACT_LOADS_KEPT:
+            # Loads no session asked for recently are dropped, and cancelled if still queued
+            _, (stale, _) = futures.popitem(last=False)
+            stale.cancel()
+        return futures[key][0]
+
+# The servant loaders and count cubes only read these cohorts; on partitioned
+# Postgres (see partitioning.py) their queries scan only those years' partitions
+current_year = date.today().year
+first_year, last_year = st.sidebar.slider(
+    "Joining years", MIN_JOINING_YEAR, current_year, (MIN_JOINING_YEAR, current_year), key="joining_years"
+)
+years = None if (first_year, last_year) == (MIN_JOINING_YEAR, current_year) else (first_year, last_year)
+
+# Fast preview: charts and metrics come from a sample until the exact load finishes in the background
+fast_preview = st.sidebar.toggle(
+    "⚡ Fast preview", value=os.getenv('TRACKER_FAST_PREVIEW', '0') not in ('', '0'), key="fast_preview",
+    help="Show estimates from a random sample of officers while the full data loads"
+)
+servant_sample = None
+# One read of the table write counters per rerun keys every cache below, and changes with writes from any process
+data_version = get_data_version()
+with span("app.load_data"):
+    if fast_preview:
+        exact_future = exact_load(data_version, years)
+        if exact_future.done() and exact_future.exception() is None:
+            servants_df, officer_family_df, politicians_df, family_df, import_batches, crossover_df = (
+                exact_future.result()
+            )
+        else:
+            servant_sample, politicians_df, family_df, import_batches, crossover_df = load_preview_data(
+                data_version, years
+            )
+            servants_df, officer_family_df = servant_sample.servants, servant_sample.officer_family
+    else:
+        servants_df, officer_family_df, politicians_df, family_df, import_batches, crossover_df = load_data(
+            data_version, years
+        )
+
+@st.fragment(run_every=1)
+def refine_when_exact(data_version, years):
+    """Rerun the whole page with exact values as soon as the background load succeeds"""
+    future = exact_load(data_version, years)
+    if not future.done():
+        st.caption("⚡ Preview from a random sample; exact values are loading in the background...")
+    elif future.exception() is None:
+        st.rerun()
+    else:
+        st.warning(f"⚡ Preview from a random sample; loading exact values failed ({future.exception()}). "
+                   f"Retrying every {EXACT_LOAD_RETRY_S:g}s.")
 
-servants_df, officer_family_df, politicians_df, family_df = load_data()
+if servant_sample is not None:
+    refine_when_exact(data_version, years)
+
+# Bulk cleanup: one DELETE per table, family members go by cascade
+st.sidebar.markdown("---")
+st.sidebar.header("🧹 Bulk Delete")
+delete_by = st.sidebar.radio("Delete everything from", ["Import batch", "Party", "Department", "Joining year"],
+                             key="bulk_delete_by")
+if delete_by == "Import batch":
+    delete_options = import_batches['batch'].unique().tolist()
+    batch_labels = import_batches.groupby('batch')['rows'].sum().to_dict()
+    delete_value = st.sidebar.selectbox(
+        "Batch", delete_options, format_func=lambda batch: f"{batch} ({batch_labels[batch]:,} rows)",
+        key="bulk_delete_batch"
+    )
+elif delete_by == "Party":
+    delete_value = st.sidebar.selectbox("Party", sorted(politicians_df['party'].dropna().unique()), key="bulk_delete_party")
+elif delete_by == "Department":
+    delete_value = st.sidebar.selectbox("Department", sorted(servants_df['department'].dropna().unique()),
+                                        key="bulk_delete_department")
+else:
+    delete_value = st.sidebar.selectbox(
+        "Joining year", sorted(servants_df['joining_year'].dropna().astype(int).unique().tolist()),
+        key="bulk_delete_joining_year"
+    )
+confirm_delete = st.sidebar.checkbox("I understand this deletes every matching record", key="bulk_delete_confirm")
+if st.sidebar.button("Delete matching records", disabled=delete_value is None or not confirm_delete):
+    filter_name = {'Import batch': 'import_batch', 'Party': 'party', 'Department': 'department',
+                   'Joining year': 'joining_year'}[delete_by]
+    deleted = bulk_delete(**{filter_name: delete_value})
+    st.sidebar.success("Deleted " + ", ".join(f"{rows:,} from {table}" for table, rows in deleted.items() if rows)
+                       if any(deleted.values()) else "Nothing matched")
+    st.cache_data.clear()
+    data_version = get_data_version()
+    servants_df, officer_family_df, politicians_df, family_df, import_batches, crossover_df = load_data(
+        data_version, years
+    )
 
 # Data selection
 data_view = st.radio(
@@ -92,64 +354,120 @@ if data_view == "Public Servants":
         )
 
         # Filter data
-        filtered_df = servants_df[
-            (servants_df['department'].isin(selected_departments)) &
-            (servants_df['education_location'].isin(selected_education))
-        ].copy()
+        with span("app.filter_servants"):
+            filtered_df = servants_df[
+                (servants_df['department'].isin(selected_departments)) &
+                (servants_df['education_location'].isin(selected_education))
+            ].copy()
+        export_controls('servants', {
+            'department': selected_departments,
+            'education_location': selected_education,
+            'joining_year': list(range(years[0], years[1] + 1)) if years else None,
+        })
     else:
         st.warning("No public servant data available.")
         filtered_df = pd.DataFrame(columns=['id', 'name', 'department', 'joining_year', 
                                           'education_location', 'university', 'degree_level'])
 
+    # Charts are cached per data version and filter selection, so unrelated reruns reuse them
+    if not filtered_df.empty:
+        servant_filters = {
+            'view': 'servants',
+            'departments': selected_departments,
+            'education': selected_education,
+            'years': years,
+            'preview': servant_sample is not None,
+        }
+        # In preview, sample counts are scaled up to estimates of the whole table
+        scale = servant_sample.scale if servant_sample is not None else (lambda counts: counts)
+        # Metrics and chart inputs are sums over the count cube instead of rescans of the rows
+        # The cube covers the loaded cohorts, so it is rebuilt when the year range changes
+        servant_cube = get_count_cube(
+            'servants_preview' if servant_sample is not None else 'servants', (data_version, years),
+            lambda: CountCube.from_frame(servants_df, SERVANT_DIMENSIONS)
+        ).select(department=selected_departments, education_location=selected_education)
+        servant_stats = servant_cube.education_stats()
+        with span("app.build_charts"):
+            distribution_chart = cached_figure('servant_education', education_distribution_figure,
+                                               scale(servant_cube.series('education_location')),
+                                               data_version, servant_filters)
+            trends_chart = cached_figure('servant_yearly_trends', yearly_trends_figure,
+                                         scale(servant_cube.frame('joining_year', 'education_location')),
+                                         data_version, servant_filters)
+            heatmap_chart = cached_figure('servant_department_heatmap', department_heatmap_figure,
+                                          scale(servant_cube.frame('department', 'education_location')),
+                                          data_version, servant_filters)
+
+        col1, col2, col3, col4 = st.columns(4)
+        if servant_sample is not None:
+            western = servant_sample.count_estimate(servant_stats.western)
+            share = servant_sample.share_estimate(servant_stats.western, servant_stats.total)
+            col1.metric("Total Officers", servant_sample.count_estimate(servant_stats.total).label())
+            col2.metric("Western Educated Officers", f"{western.label()} ({share.label(percent=True)})")
+        else:
+            col1.metric("Total Officers", servant_stats.total)
+            col2.metric("Western Educated Officers", servant_stats.western_label())
+        col3.metric("Top Western Country", servant_stats.top_western_country or "N/A")
+        col4.metric("Most Common Western Degree", servant_stats.top_western_degree or "N/A")
+
+        st.subheader("📊 Education Distribution")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(distribution_chart, use_container_width=True)
+        with col2:
+            st.plotly_chart(trends_chart, use_container_width=True)
+        st.plotly_chart(heatmap_chart, use_container_width=True)
+
     # Display officer information and family members
     if not filtered_df.empty:
         st.subheader("👥 Officers List")
-        for _, servant in filtered_df.iterrows():
-            with st.expander(f"👤 {servant['name']} ({servant['department']})"):
-                # Create three columns for better layout
-                info_col1, info_col2, info_col3 = st.columns(3)
-
-                with info_col1:
-                    st.markdown("**🏢 Department**")
-                    st.info(servant['department'])
-
-                with info_col2:
-                    st.markdown("**🎓 Education**")
-                    st.info(f"{servant['degree_level']} from {servant['university']}")
-
-                with info_col3:
-                    st.markdown("**🌍 Location**")
-                    st.info(servant['education_location'])
-
-                # Family members
-                family_members = officer_family_df[officer_family_df['officer_id'] == servant['id']]
-                if not family_members.empty:
-                    st.markdown("---")
-                    st.markdown("### 👨‍👩‍👧‍👦 Family Members")
-                    for _, member in family_members.iterrows():
-                        st.markdown(f"""
-                        <div style='margin-left: 20px; border-left: 2px solid #f63366; padding-left: 20px;'>
-                            <h4 style='color: #f63366;'>├─ {member['name']} ({member['relation_type']})</h4>
-                            <p style='margin-left: 20px;'>
-                                📚 Education: {member['degree_level']}<br>
-                                🏛️ University: {member['university']}<br>
-                                🌍 Location: {member['education_location']}
-                            </p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.info("No family members recorded")
-
-                # Delete button
-                if st.button("🗑️ Delete", key=f"del_servant_{servant['id']}"):
-                    if delete_servant(servant['id']):
-                        st.success(f"Deleted {servant['name']}")
-                        st.cache_data.clear()
-                        st.rerun()
+        with span("app.render_officer_list"):
+            for _, servant in filtered_df.iterrows():
+                with st.expander(f"👤 {servant['name']} ({servant['department']})"):
+                    # Create three columns for better layout
+                    info_col1, info_col2, info_col3 = st.columns(3)
+
+                    with info_col1:
+                        st.markdown("**🏢 Department**")
+                        st.info(servant['department'])
+
+                    with info_col2:
+                        st.markdown("**🎓 Education**")
+                        st.info(f"{servant['degree_level']} from {servant['university']}")
+
+                    with info_col3:
+                        st.markdown("**🌍 Location**")
+                        st.info(servant['education_location'])
+
+                    # Family members
+                    family_members = officer_family_df[officer_family_df['officer_id'] == servant['id']]
+                    if not family_members.empty:
+                        st.markdown("---")
+                        st.markdown("### 👨‍👩‍👧‍👦 Family Members")
+                        for _, member in family_members.iterrows():
+                            st.markdown(f"""
+                            <div style='margin-left: 20px; border-left: 2px solid #f63366; padding-left: 20px;'>
+                                <h4 style='color: #f63366;'>├─ {member['name']} ({member['relation_type']})</h4>
+                                <p style='margin-left: 20px;'>
+                                    📚 Education: {member['degree_level']}<br>
+                                    🏛️ University: {member['university']}<br>
+                                    🌍 Location: {member['education_location']}
+                                </p>
+                            </div>
+                            """, unsafe_allow_html=True)
                     else:
-                        st.error("Failed to delete public servant")
+                        st.info("No family members recorded")
+
+                    # Delete button
+                    if st.button("🗑️ Delete", key=f"del_servant_{servant['id']}"):
+                        if delete_servant(servant['id']):
+                            st.success(f"Deleted {servant['name']}")
+                            st.cache_data.clear()
+                            st.rerun()
+                        else:
+                            st.error("Failed to delete public servant")
 
-                st.markdown("---")
+                    st.markdown("---")
 
 else:
     # Politicians and family members view
@@ -166,103 +484,124 @@ else:
         )
 
         # Filter data
-        filtered_politicians = politicians_df[politicians_df['party'].isin(selected_parties)]
-        filtered_family = family_df[family_df['politician_name'].isin(filtered_politicians['name'])]
+        with span("app.filter_politicians"):
+            filtered_politicians = politicians_df[politicians_df['party'].isin(selected_parties)]
+            filtered_family = family_df[family_df['politician_name'].isin(filtered_politicians['name'])]
+        export_controls('politicians', {'party': selected_parties})
 
         # Display hierarchical view with enhanced styling
         st.subheader("👨‍👩‍👧‍👦 Family Tree View")
 
-        for _, politician in filtered_politicians.iterrows():
-            with st.expander(f"🏛️ {politician['name']} ({politician['party']})"):
-                # Create three columns for better layout
-                info_col1, info_col2, info_col3 = st.columns(3)
-
-                with info_col1:
-                    st.markdown("**🎭 Position**")
-                    st.info(politician['position'])
-
-                with info_col2:
-                    st.markdown("**🎓 Education**")
-                    st.info(f"{politician['degree_level']} from {politician['university']}")
-
-                with info_col3:
-                    st.markdown("**🌍 Location**")
-                    st.info(politician['education_location'])
-
-                # Family members with enhanced tree structure
-                family_members = filtered_family[filtered_family['politician_name'] == politician['name']]
-                if not family_members.empty:
-                    st.markdown("---")
-                    st.markdown("### 👨‍👩‍👧‍👦 Family Members")
-                    for _, member in family_members.iterrows():
-                        st.markdown(f"""
-                        <div style='margin-left: 20px; border-left: 2px solid #f63366; padding-left: 20px;'>
-                            <h4 style='color: #f63366;'>├─ {member['name']} ({member['relation_type']})</h4>
-                            <p style='margin-left: 20px;'>
-                                📚 Education: {member['degree_level']}<br>
-                                🏛️ University: {member['university']}<br>
-                                🌍 Location: {member['education_location']}
-                            </p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.info("No family members recorded")
-
-                st.markdown("---")
-
-        # Add delete buttons for each politician
-        for _, politician in filtered_politicians.iterrows():
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.write(f"🏛️ {politician['name']} ({politician['party']})")
-            with col2:
-                if st.button("🗑️ Delete", key=f"del_{politician['id']}"):
-                    if delete_politician(politician['id']):
-                        st.success(f"Deleted {politician['name']} and associated family members")
-                        st.cache_data.clear()
-                        st.rerun()
+        with span("app.render_politician_list"):
+            for _, politician in filtered_politicians.iterrows():
+                with st.expander(f"🏛️ {politician['name']} ({politician['party']})"):
+                    # Create three columns for better layout
+                    info_col1, info_col2, info_col3 = st.columns(3)
+
+                    with info_col1:
+                        st.markdown("**🎭 Position**")
+                        st.info(politician['position'])
+
+                    with info_col2:
+                        st.markdown("**🎓 Education**")
+                        st.info(f"{politician['degree_level']} from {politician['university']}")
+
+                    with info_col3:
+                        st.markdown("**🌍 Location**")
+                        st.info(politician['education_location'])
+
+                    # Family members with enhanced tree structure
+                    family_members = filtered_family[filtered_family['politician_name'] == politician['name']]
+                    if not family_members.empty:
+                        st.markdown("---")
+                        st.markdown("### 👨‍👩‍👧‍👦 Family Members")
+                        for _, member in family_members.iterrows():
+                            st.markdown(f"""
+                            <div style='margin-left: 20px; border-left: 2px solid #f63366; padding-left: 20px;'>
+                                <h4 style='color: #f63366;'>├─ {member['name']} ({member['relation_type']})</h4>
+                                <p style='margin-left: 20px;'>
+                                    📚 Education: {member['degree_level']}<br>
+                                    🏛️ University: {member['university']}<br>
+                                    🌍 Location: {member['education_location']}
+                                </p>
+                            </div>
+                            """, unsafe_allow_html=True)
                     else:
-                        st.error("Failed to delete politician")
+                        st.info("No family members recorded")
 
+                    st.markdown("---")
 
-        # Statistics in columns
+            # Add delete buttons for each politician
+            for _, politician in filtered_politicians.iterrows():
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.write(f"🏛️ {politician['name']} ({politician['party']})")
+                with col2:
+                    if st.button("🗑️ Delete", key=f"del_{politician['id']}"):
+                        if delete_politician(politician['id']):
+                            st.success(f"Deleted {politician['name']} and associated family members")
+                            st.cache_data.clear()
+                            st.rerun()
+                        else:
+                            st.error("Failed to delete politician")
+
+
+        # Statistics in columns, from count cubes keyed by party
+        politician_cube = get_count_cube(
+            'politicians', data_version, lambda: CountCube.from_frame(politicians_df, POLITICIAN_DIMENSIONS)
+        ).select(party=selected_parties)
+        family_cube = get_count_cube(
+            'politician_family', data_version, lambda: CountCube.from_frame(
+                family_df.assign(party=family_df['politician_id'].map(politicians_df.set_index('id')['party'])),
+                POLITICIAN_DIMENSIONS
+            )
+        ).select(party=selected_parties)
+        politician_stats = politician_cube.education_stats()
+        family_stats = family_cube.education_stats()
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Total Politicians", len(filtered_politicians))
-            western_edu_politicians = filtered_politicians[
-                filtered_politicians['education_location'].isin(['USA', 'UK', 'Canada', 'Australia'])
-            ]
-            st.metric("Western Educated Politicians",
-                     f"{len(western_edu_politicians)} ({len(western_edu_politicians)/len(filtered_politicians)*100:.1f}%)")
+            st.metric("Total Politicians", politician_stats.total)
+            st.metric("Western Educated Politicians", politician_stats.western_label())
 
         with col2:
-            st.metric("Total Family Members", len(filtered_family))
-            if not filtered_family.empty:
-                western_edu_family = filtered_family[
-                    filtered_family['education_location'].isin(['USA', 'UK', 'Canada', 'Australia'])
-                ]
-                st.metric("Western Educated Family Members",
-                         f"{len(western_edu_family)} ({len(western_edu_family)/len(filtered_family)*100:.1f}%)")
+            st.metric("Total Family Members", family_stats.total)
+            if family_stats.total:
+                st.metric("Western Educated Family Members", family_stats.western_label())
 
         # Education distribution charts
         st.subheader("📊 Education Distribution")
+        politician_filters = {'view': 'politicians', 'parties': selected_parties}
+        with span("app.build_charts"):
+            politician_chart = cached_figure('politician_education', education_distribution_figure,
+                                             politician_cube.series('education_location'),
+                                             data_version, politician_filters)
+            family_chart = cached_figure('politician_family_education', education_distribution_figure,
+                                         family_cube.series('education_location'),
+                                         data_version, politician_filters) if family_stats.total else None
         col1, col2 = st.columns(2)
 
         with col1:
             st.plotly_chart(
-                create_education_distribution_chart(filtered_politicians),
+                politician_chart,
                 use_container_width=True
             )
             st.caption("Politicians' Education Distribution")
 
         with col2:
-            if not filtered_family.empty:
+            if family_chart is not None:
                 st.plotly_chart(
-                    create_education_distribution_chart(filtered_family),
+                    family_chart,
                     use_container_width=True
                 )
                 st.caption("Family Members' Education Distribution")
 
+        with st.expander("🔗 Family members in the civil service"):
+            crossover = crossover_df[crossover_df['party'].isin(selected_parties)]
+            if crossover.empty:
+                st.info("No family members matched to public servants. Run `python manage.py resolve` to link records.")
+            else:
+                st.dataframe(crossover.drop(columns=['servant_id']), use_container_width=True)
+
     else:
         st.warning("No politician data available.")
         filtered_politicians = pd.DataFrame()
@@ -275,14 +614,18 @@ if data_view == "Public Servants":
     # Option to add to existing officer
     add_to_existing = st.checkbox("Add children to existing officer")
 
+    # Widgets inside a form do not rerun, so the search box sits above it
+    officer_query = ""
+    if add_to_existing and len(servants_df) > PICKER_SEARCH_THRESHOLD:
+        officer_query = st.text_input("Search officers", key="officer_picker_query")
+
     with st.form("new_officer_form"):
         if add_to_existing:
-            # Get list of existing officers
-            existing_officers = servants_df[['id', 'name', 'department']].drop_duplicates()
+            officer_ids, officer_labels = picker_options(servants_df, 'department', 'servant', officer_query)
             selected_officer = st.selectbox(
                 "Select Officer",
-                options=existing_officers['id'].tolist(),
-                format_func=lambda x: f"{existing_officers[existing_officers['id']==x]['name'].iloc[0]} ({existing_officers[existing_officers['id']==x]['department'].iloc[0]})"
+                options=officer_ids,
+                format_func=officer_labels.get
             )
 
             # Only show children inputs
@@ -314,12 +657,15 @@ if data_view == "Public Servants":
                     })
 
             if st.form_submit_button("Add Children"):
-                try:
-                    add_children_to_officer(selected_officer, family_data)
-                    st.success("Children added successfully!")
-                    st.cache_data.clear()
-                except ValueError as e:
-                    st.error(str(e))
+                if selected_officer is None:
+                    st.error("Search for and select an officer first.")
+                else:
+                    try:
+                        add_children_to_officer(selected_officer, family_data)
+                        st.success("Children added successfully!")
+                        st.cache_data.clear()
+                    except ValueError as e:
+                        st.error(str(e))
         else:
             # Original new officer form
             name = st.text_input("Officer Name")
@@ -380,14 +726,18 @@ else:
     # Option to add to existing politician
     add_to_existing = st.checkbox("Add children to existing politician")
 
+    # Widgets inside a form do not rerun, so the search box sits above it
+    politician_query = ""
+    if add_to_existing and len(politicians_df) > PICKER_SEARCH_THRESHOLD:
+        politician_query = st.text_input("Search politicians", key="politician_picker_query")
+
     with st.form("new_politician_form"):
         if add_to_existing:
-            # Get list of existing politicians
-            existing_politicians = politicians_df[['id', 'name', 'party']].drop_duplicates()
+            politician_ids, politician_labels = picker_options(politicians_df, 'party', 'politician', politician_query)
             selected_politician = st.selectbox(
                 "Select Politician",
-                options=existing_politicians['id'].tolist(),
-                format_func=lambda x: f"{existing_politicians[existing_politicians['id']==x]['name'].iloc[0]} ({existing_politicians[existing_politicians['id']==x]['party'].iloc[0]})"
+                options=politician_ids,
+                format_func=politician_labels.get
             )
 
             # Only show children inputs
@@ -419,12 +769,15 @@ else:
                     })
 
             if st.form_submit_button("Add Children"):
-                try:
-                    add_children_to_politician(selected_politician, family_data)
-                    st.success("Children added successfully!")
-                    st.cache_data.clear()
-                except ValueError as e:
-                    st.error(str(e))
+                if selected_politician is None:
+                    st.error("Search for and select a politician first.")
+                else:
+                    try:
+                        add_children_to_politician(selected_politician, family_data)
+                        st.success("Children added successfully!")
+                        st.cache_data.clear()
+                    except ValueError as e:
+                        st.error(str(e))
         else:
             # Original new politician form
             col1, col2 = st.columns(2)
@@ -490,4 +843,19 @@ else:
 st.markdown("""
 ---
 *Data is stored in a PostgreSQL database*
-""")
\ No newline at end of file
+""")
+
+# Profiler panel, enabled with TRACKER_DEBUG=1 or ?debug=1
+if DEBUG_MODE:
+    with st.sidebar.expander("🛠️ Profiler", expanded=True):
+        for warning in rerun_trace.warnings:
+            st.warning(warning)
+        st.markdown("**This rerun**")
+        st.dataframe(trace_frame(rerun_trace), hide_index=True, use_container_width=True)
+        st.markdown("**Figure cache**")
+        st.json(figure_cache.info())
+        st.markdown("**Since process start**")
+        st.dataframe(
+            pd.DataFrame.from_dict(get_stats(), orient='index').sort_values('total_time', ascending=False),
+            use_container_width=True
+        )
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""Concurrent read API on SQLAlchemy's asyncio extension.
+
+The loader queries from database.py run at the same time on separate
+connections, so a cold load takes about as long as the slowest query rather
+than the sum of them. Postgres goes through asyncpg and SQLite through
+aiosqlite; neither is a hard dependency, so check async_reads_available() before
+use. Each query runs on its own connection and snapshot, so the lookups are
+read after the data queries finish and include every id their rows reference.
+The *_sync wrappers run the coroutines on one background event loop that
+owns the async engine, which keeps them usable from Streamlit's script thread,
+and carry the caller's profiling span over so the statements are counted in it.
+"""
+import asyncio
+import contextvars
+import importlib.util
+import threading
+
+import pandas as pd
+
+from sqlalchemy.engine import make_url
+
+from database import (
+    servant_queries, SERVANT_COLUMNS, OFFICER_FAMILY_COLUMNS,
+    POLITICIANS_QUERY, POLITICIAN_COLUMNS, POLITICIAN_FAMILY_QUERY, POLITICIAN_FAMILY_COLUMNS,
+    IMPORT_BATCHES_QUERY, IMPORT_BATCHES_COLUMNS, CROSSOVER_QUERY, CROSSOVER_COLUMNS
+)
+from lookups import LOOKUP_NAMES_QUERY, decode_frame, lookup_names_from_rows
+from models import DATABASE_URL
+from profiling import instrument_engine, instrumented
+
+# Backend -> (async driver name, module it needs)
+ASYNC_DRIVERS = {
+    'postgresql': ('asyncpg', 'asyncpg'),
+    'sqlite': ('aiosqlite', 'aiosqlite'),
+}
+
+_engine = None
+_loop = None
+_lock = threading.Lock()
+
+
+def async_url(url=DATABASE_URL):
+    """The DATABASE_URL rewritten to use the backend's async driver"""
+    url = make_url(url)
+    driver, _ = ASYNC_DRIVERS[url.get_backend_name()]
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def async_reads_available(url=DATABASE_URL):
+    """Whether the async driver for this database is installed"""
+    backend = make_url(url).get_backend_name()
+    return backend in ASYNC_DRIVERS and importlib.util.find_spec(ASYNC_DRIVERS[backend][1]) is not None
+
+
+def get_async_engine():
+    global _engine
+    if _engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _engine = create_async_engine(async_url())
+        instrument_engine(_engine.sync_engine)
+    return _engine
+
+
+async def _fetch(query):
+    async with get_async_engine().connect() as connection:
+        return (await connection.execute(query)).all()
+
+
+async def get_all_servants_async(years=None):
+    """Async get_all_servants: servants and officer families fetched concurrently, then the lookups"""
+    servants_query, family_query = servant_queries(years)
+    servants, family = await asyncio.gather(_fetch(servants_query), _fetch(family_query))
+    names = lookup_names_from_rows(await _fetch(LOOKUP_NAMES_QUERY))
+    return (
+        decode_frame(servants, SERVANT_COLUMNS, names),
+        decode_frame(family, OFFICER_FAMILY_COLUMNS, names)
+    )
+
+
+async def get_all_politicians_async():
+    """Async get_all_politicians: politicians and their families fetched concurrently, then the lookups"""
+    politicians, family = await asyncio.gather(_fetch(POLITICIANS_QUERY), _fetch(POLITICIAN_FAMILY_QUERY))
+    names = lookup_names_from_rows(await _fetch(LOOKUP_NAMES_QUERY))
+    return (
+        decode_frame(politicians, POLITICIAN_COLUMNS, names),
+        decode_frame(family, POLITICIAN_FAMILY_COLUMNS, names)
+    )
+
+
+async def load_all_async(years=None):
+    """The dashboard's tables and aggregates, their six queries in flight at once and then the lookups.
+
+    Returns (servants, officer_family, politicians, politician_family,
+    import_batches, crossover), the last two as get_import_batches and
+    get_politician_children_in_civil_service return them. years limits the
+    servant queries to (first, last) joining years, as in servant_queries.
+    """
+    servants_query, family_query = servant_queries(years)
+    servants, officer_family, politicians, politician_family, import_batches, crossover = await asyncio.gather(
+        _fetch(servants_query), _fetch(family_query), _fetch(POLITICIANS_QUERY), _fetch(POLITICIAN_FAMILY_QUERY),
+        _fetch(IMPORT_BATCHES_QUERY), _fetch(CROSSOVER_QUERY)
+    )
+    names = lookup_names_from_rows(await _fetch(LOOKUP_NAMES_QUERY))
+    return (
+        decode_frame(servants, SERVANT_COLUMNS, names),
+        decode_frame(officer_family, OFFICER_FAMILY_COLUMNS, names),
+        decode_frame(politicians, POLITICIAN_COLUMNS, names),
+        decode_frame(politician_family, POLITICIAN_FAMILY_COLUMNS, names),
+        pd.DataFrame(import_batches, columns=IMPORT_BATCHES_COLUMNS),
+        decode_frame(crossover, CROSSOVER_COLUMNS, names)
+    )
+
+
+async def _in_context(coroutine, context):
+    return await asyncio.get_running_loop().create_task(coroutine, context=context)
+
+
+def _run(coroutine):
+    """Run a coroutine on the background loop that owns the async engine and wait for it"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-database", daemon=True).start()
+    # In the caller's context the profiler attributes the coroutine's statements to the caller's span
+    return asyncio.run_coroutine_threadsafe(_in_context(coroutine, contextvars.copy_context()), _loop).result()
+
+
+@instrumented
+def load_all_sync(years=None):
+    return _run(load_all_async(years))
+
+
+def get_all_servants_sync(years=None):
+    return _run(get_all_servants_async(years))
+
+
+def get_all_politicians_sync():
+    return _run(get_all_politicians_async())
@@ -0,0 +1,304 @@
+"""Concurrent-session load test for the Streamlit dashboard.
+
+Usage:
+    python benchmarks/load_test.py                               # 1, 5 and 10 sessions on 500 rows
+    python benchmarks/load_test.py --sessions 1,10,25,50 --rows 5000 --steps 30
+    python benchmarks/load_test.py --database-url postgresql://localhost/bench --think-time 1
+
+Each simulated analyst is an AppTest session driving app.py in its own thread,
+the way the Streamlit server runs one script thread per browser tab. Sessions
+start together and each performs --steps random actions: switching views,
+changing filters, searching and submitting the add-officer form. The report
+covers p50/p95 rerun latency overall and per action, the peak number of
+database connections checked out across every SQLAlchemy pool, and process
+memory. The capacity is the largest session count whose p95 stays within
+--target-p95 without errors. Results are written as JSON under
+benchmarks/results/. The database is seeded with data_generator after being
+dropped and recreated, so never point --database-url at real data.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from run_benchmarks import ROOT, RESULTS_DIR, git_revision, populate
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_SESSIONS = [1, 5, 10]
+# Relative frequency of each action; submit_form's weight is --write-ratio
+ACTION_WEIGHTS = {'switch_view': 0.25, 'filter': 0.4, 'search': 0.25}
+SAMPLE_INTERVAL_S = 0.1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='Scratch database to use (default: a temporary SQLite file)')
+    parser.add_argument('--rows', type=int, default=500, help='Servants and politicians to seed')
+    parser.add_argument('--sessions', default=','.join(str(n) for n in DEFAULT_SESSIONS),
+                        help='Comma-separated concurrent session counts to test in turn')
+    parser.add_argument('--steps', type=int, default=10, help='Actions per session after the first page load')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='Mean pause in seconds between a session\'s actions')
+    parser.add_argument('--write-ratio', type=float, default=0.05,
+                        help='Share of actions that submit the add-officer form')
+    parser.add_argument('--target-p95', type=float, default=2.0,
+                        help='p95 rerun latency in seconds a session count must stay within to count as served')
+    parser.add_argument('--timeout', type=float, default=300, help='Seconds one rerun may take before failing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Where to write the JSON results')
+    return parser.parse_args(argv)
+
+
+def rss_mb():
+    """Resident memory of this process in MB"""
+    if psutil:
+        return psutil.Process().memory_info().rss / 2**20
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+class ConnectionTracker:
+    """Connections checked out of every SQLAlchemy pool in the process, including the async engine's"""
+
+    def __init__(self):
+        from sqlalchemy import event
+        from sqlalchemy.pool import Pool
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        event.listen(Pool, 'checkout', self._checkout)
+        event.listen(Pool, 'checkin', self._checkin)
+
+    def _checkout(self, *args):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def _checkin(self, *args):
+        with self._lock:
+            self.current -= 1
+
+    def reset_peak(self):
+        with self._lock:
+            self.peak = self.current
+
+
+class MemorySampler:
+    """Peak RSS seen by a background thread while the block runs"""
+
+    def __enter__(self):
+        self.start = self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL_S):
+            self.peak = max(self.peak, rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end = rss_mb()
+        self.peak = max(self.peak, self.end)
+
+
+def share_apptest_runtime():
+    """Let AppTest sessions run concurrently, sharing one runtime and its caches like a server process.
+
+    AppTest installs a fresh mock Runtime for each run and clears it when the
+    run ends, which pulls the runtime out from under any other session's script
+    thread that is still running. Pin one shared mock runtime instead and point
+    AppTest's own bookkeeping at a stand-in class.
+    """
+    from unittest.mock import MagicMock
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import app_test
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    app_test.Runtime = type('PerRunRuntime', (), {'_instance': None})
+    # Each run patches and restores this option; concurrent restores must not switch it off mid-run
+    config.set_option('global.appTest', True)
+
+
+def _widget(widgets, label):
+    return next((widget for widget in widgets if widget.label == label), None)
+
+
+def apply_action(at, action, rng, name):
+    """Set the widgets for one user action on a session that has already run; returns the action taken"""
+    view = _widget(at.radio, "Select Data View")
+    if action == 'submit_form' and view.value != "Public Servants":
+        action = 'switch_view'
+    if action == 'switch_view':
+        view.set_value(next(option for option in view.options if option != view.value))
+    elif action == 'filter':
+        select = (_widget(at.sidebar.multiselect, "Select Departments")
+                  or _widget(at.sidebar.multiselect, "Select Parties"))
+        if select is None or not select.options:
+            return apply_action(at, 'search', rng, name)
+        select.set_value(rng.sample(select.options, k=rng.randint(1, len(select.options))))
+    elif action == 'search':
+        at.sidebar.text_input(key='search_query').input(f"Officer {rng.randrange(1000)}")
+    else:
+        _widget(at.text_input, "Officer Name").input(name)
+        _widget(at.button, "Add Officer").click()
+    return action
+
+
+def run_session(index, args, barrier):
+    """One analyst: a first page load, then --steps actions; returns [(action, seconds, errors)]"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(args.seed * 100003 + index)
+    actions, weights = zip(*{**ACTION_WEIGHTS, 'submit_form': args.write_ratio}.items())
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=args.timeout)
+    timings = []
+    barrier.wait()
+    for step in range(args.steps + 1):
+        action = 'load' if step == 0 else apply_action(
+            at, rng.choices(actions, weights)[0], rng, f"Load Test Officer {index}-{step}"
+        )
+        start = time.perf_counter()
+        at.run()
+        timings.append((action, time.perf_counter() - start, len(at.exception)))
+        if args.think_time:
+            time.sleep(rng.uniform(0, 2 * args.think_time))
+    return timings
+
+
+def percentiles(seconds):
+    return {
+        'p50_s': round(float(np.percentile(seconds, 50)), 4),
+        'p95_s': round(float(np.percentile(seconds, 95)), 4),
+        'max_s': round(float(np.max(seconds)), 4),
+    }
+
+
+def run_level(sessions, args, connections):
+    """Run `sessions` concurrent sessions and summarize their reruns"""
+    from models import engine
+
+    barrier = threading.Barrier(sessions)
+    connections.reset_peak()
+    with MemorySampler() as memory, ThreadPoolExecutor(max_workers=sessions) as executor:
+        start = time.perf_counter()
+        timings = [t for result in executor.map(lambda i: run_session(i, args, barrier), range(sessions))
+                   for t in result]
+        elapsed = time.perf_counter() - start
+
+    by_action = {}
+    for action, seconds, _ in timings:
+        by_action.setdefault(action, []).append(seconds)
+    return {
+        'sessions': sessions,
+        'reruns': len(timings),
+        'errors': sum(errors for _, _, errors in timings),
+        **percentiles([seconds for _, seconds, _ in timings]),
+        'reruns_per_s': round(len(timings) / elapsed, 3),
+        'by_action': {action: {'count': len(seconds), **percentiles(seconds)} for action, seconds in by_action.items()},
+        'db_connections_peak': connections.peak,
+        'db_pool': engine.pool.status(),
+        'rss_mb_start': round(memory.start, 1),
+        'rss_mb_peak': round(memory.peak, 1),
+        'rss_mb_end': round(memory.end, 1),
+    }
+
+
+def print_level(level):
+    print(f"{level['sessions']:>8} {level['reruns']:>7} {level['errors']:>6} {level['p50_s']:>8.3f} "
+          f"{level['p95_s']:>8.3f} {level['max_s']:>8.3f} {level['reruns_per_s']:>8.2f} "
+          f"{level['db_connections_peak']:>9} {level['rss_mb_peak']:>11.1f}", flush=True)
+    for action, stats in sorted(level['by_action'].items()):
+        print(f"{'':>8} {action:<14} {stats['count']:>5} reruns  p50 {stats['p50_s']:.3f}s  p95 {stats['p95_s']:.3f}s")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    levels = [int(n) for n in args.sessions.split(',')]
+    scratch = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        scratch.close()
+        os.environ['DATABASE_URL'] = f'sqlite:///{scratch.name}'
+
+    # models.py reads DATABASE_URL on import, so project modules load only after it is set
+    sys.path.insert(0, ROOT)
+    from models import engine
+
+    results = []
+    try:
+        populate(args.rows)
+        connections = ConnectionTracker()
+        share_apptest_runtime()
+        # Sessions driven outside a server log a bare-mode warning on every run
+        logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').setLevel(logging.ERROR)
+        # One untimed page load pays for imports and first-use caches, as on a warm server
+        warm = argparse.Namespace(**{**vars(args), 'steps': 0, 'think_time': 0})
+        run_session(0, warm, threading.Barrier(1))
+
+        print(f"{'sessions':>8} {'reruns':>7} {'errors':>6} {'p50 s':>8} {'p95 s':>8} {'max s':>8} "
+              f"{'reruns/s':>8} {'conn peak':>9} {'RSS peak MB':>11}")
+        for sessions in levels:
+            level = run_level(sessions, args, connections)
+            results.append(level)
+            print_level(level)
+    finally:
+        engine.dispose()
+        if scratch:
+            os.unlink(scratch.name)
+
+    served = [level['sessions'] for level in results if level['p95_s'] <= args.target_p95 and not level['errors']]
+    capacity = max(served, default=0)
+    print(f"\nCapacity: {capacity} concurrent sessions within a p95 of {args.target_p95}s")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'database': engine.dialect.name,
+            'rows': args.rows,
+            'steps': args.steps,
+            'think_time_s': args.think_time,
+            'write_ratio': args.write_ratio,
+            'target_p95_s': args.target_p95,
+        },
+        'capacity_sessions': capacity,
+        'levels': results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['git_revision'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""Scaled benchmarks for the loaders, seeding, imports, parsers, generator and charts.
+
+Usage:
+    python benchmarks/run_benchmarks.py                          # SQLite file, 1k/100k/1M rows
+    python benchmarks/run_benchmarks.py --sizes 1000,100000
+    python benchmarks/run_benchmarks.py --database-url postgresql://localhost/bench
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<earlier run>.json
+
+Every benchmark reports wall time, SQL statements issued and peak memory traced by
+tracemalloc (tracing slows allocation-heavy code, so compare runs with each other
+rather than with untraced timings; libxml2's own allocations are not traced, so the
+roster parser benchmarks undercount memory on both sides). Roster pages are the
+saved pages in benchmarks/fixtures with their rows repeated to each size, parsed
+both by the streaming roster parser and by trafilatura plus regexes. Results are written as JSON under
+benchmarks/results/. The database is dropped and recreated, so never point
+--database-url at real data.
+"""
+import argparse
+import json
+import itertools
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+FIXTURES_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+# Roster source -> saved page whose rows are repeated to the benchmark size
+ROSTER_FIXTURES = {'lok_sabha': 'lok_sabha_members.html', 'upsc': 'upsc_civil_list.html'}
+# trafilatura holds and rescans whole pages; above this many rows it takes minutes
+ROSTER_BASELINE_MAX_ROWS = 100_000
+
+EDUCATION_TEXTS = [
+    'Completed Ph.D. from Delhi University',
+    'Masters from IIT Delhi',
+    'M.Sc. in Economics from London School of Economics, UK',
+    'B.Tech. from Indian Institute of Technology and MBA from Harvard University in the USA',
+    'Studied law at a college in Canada',
+    'Bachelor of Arts from Allahabad University',
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='Scratch database to use (default: a temporary SQLite file)')
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help='Comma-separated row counts')
+    parser.add_argument('--only', help='Run only benchmarks whose name contains this text')
+    parser.add_argument('--output', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Earlier results JSON to print ratios against')
+    return parser.parse_args(argv)
+
+
+class QueryCounter:
+    """Counts statements sent through an engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+class BenchmarkRunner:
+    def __init__(self, counter, only=None):
+        self.counter = counter
+        self.only = only
+        self.results = []
+
+    def run(self, name, rows, fn):
+        """Time fn(), recording its statement count and peak traced memory"""
+        if self.only and self.only not in name:
+            return None
+        self.counter.count = 0
+        tracemalloc.start()
+        start = time.perf_counter()
+        value = fn()
+        wall_time = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result = {
+            'name': name,
+            'rows': rows,
+            'wall_time_s': round(wall_time, 6),
+            'queries': self.counter.count,
+            'peak_memory_mb': round(peak / 2**20, 3),
+        }
+        self.results.append(result)
+        print(f"{name:<45} {rows:>9,} rows  {wall_time:9.3f}s  {self.counter.count:>6} queries  "
+              f"{result['peak_memory_mb']:9.1f} MB", flush=True)
+        return value
+
+
+def reset_schema():
+    from models import Base, engine
+    from normalization import seed_institutions
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    seed_institutions()
+
+
+def populate(n):
+    """Fill the scratch database with n servants and n politicians plus generated families"""
+    from data_generator import generate_public_servant_data, generate_politician_data, generate_family_data
+    from database import insert_frame
+    from lookups import RecordEncoder
+    from models import PublicServant, Politician, PoliticianFamily, OfficerFamily, SessionLocal
+
+    reset_schema()
+    db = SessionLocal()
+    try:
+        encoder = RecordEncoder(db)
+        insert_frame(db, PublicServant, encoder.encode_frame(generate_public_servant_data(n)))
+        insert_frame(db, Politician, encoder.encode_frame(generate_politician_data(n)))
+        ids = list(range(1, n + 1))
+        insert_frame(db, PoliticianFamily, encoder.encode_frame(generate_family_data(ids)))
+        officer_family = generate_family_data(ids).rename(columns={'politician_id': 'officer_id'})
+        insert_frame(db, OfficerFamily, encoder.encode_frame(officer_family))
+        db.commit()
+    finally:
+        db.close()
+
+
+def scaled_scraper(n):
+    """A GovernmentDataScraper whose scrape_* methods return n parsed records"""
+    from scrapers.government_scraper import GovernmentDataScraper
+
+    class ScaledScraper(GovernmentDataScraper):
+        def scrape_mp_data(self):
+            return [{
+                'name': f'Bench MP {i}',
+                'position': 'MP',
+                'party': f'Party {i % 7}',
+                'education_info': self.parse_education_info(EDUCATION_TEXTS[i % len(EDUCATION_TEXTS)])
+            } for i in range(n)]
+
+        def scrape_civil_servants(self):
+            return [{
+                'name': f'Bench Officer {i}',
+                'department': 'IAS',
+                'joining_year': 2000 + i % 24,
+                'education_info': self.parse_education_info(EDUCATION_TEXTS[i % len(EDUCATION_TEXTS)])
+            } for i in range(n)]
+
+    return ScaledScraper()
+
+
+def scaled_roster_page(fixture, n):
+    """Path of a temporary copy of a saved roster page with its table rows repeated to n rows"""
+    with open(os.path.join(FIXTURES_DIR, fixture), encoding='utf-8') as f:
+        html = f.read()
+    body = re.search(r'<tbody>(.*?)</tbody>', html, re.S)
+    rows = re.findall(r'<tr.*?</tr>', body.group(1), re.S)
+    page = tempfile.NamedTemporaryFile('w', suffix='.html', encoding='utf-8', delete=False)
+    with page:
+        page.write(html[:body.start(1)])
+        for row in itertools.islice(itertools.cycle(rows), n):
+            page.write(row + '\n')
+        page.write(html[body.end(1):])
+    return page.name
+
+
+def extract_roster_text(path):
+    """The full-document way: trafilatura's text of the page, then a regex over its table lines"""
+    import trafilatura
+
+    with open(path, encoding='utf-8') as f:
+        text = trafilatura.extract(f.read(), include_tables=True) or ''
+    return [[cell.strip() for cell in line.strip('| ').split('|')]
+            for line in re.findall(r'^\|.*\|\s*$', text, re.M)]
+
+
+def run_rosters(runner, n):
+    from scrapers.government_scraper import GovernmentDataScraper
+
+    scraper = GovernmentDataScraper()
+    for source, fixture in ROSTER_FIXTURES.items():
+        page = scaled_roster_page(fixture, n)
+        try:
+            runner.run(f'GovernmentDataScraper.iter_roster_page.{source}', n,
+                       lambda: sum(1 for _ in scraper.iter_roster_page(source, page)))
+            if n <= ROSTER_BASELINE_MAX_ROWS:
+                runner.run(f'trafilatura.extract_roster.{source}', n, lambda: len(extract_roster_text(page)))
+        finally:
+            os.unlink(page)
+
+
+def warm_up():
+    """Pay one-off import and Plotly template costs before anything is timed"""
+    import data_generator
+    import utils
+    sample = data_generator.generate_public_servant_data(10)
+    for chart in (utils.create_education_distribution_chart, utils.create_yearly_trends,
+                  utils.create_department_education_heatmap):
+        chart(sample)
+
+
+def run_size(runner, n):
+    import data_generator
+    import database
+    import utils
+    from count_cube import CountCube, SERVANT_DIMENSIONS
+    from data_integration import DataIntegrator
+    from scrapers.government_scraper import GovernmentDataScraper
+
+    populate(n)
+    loaded = runner.run('database.get_all_servants', n, database.get_all_servants)
+    servants, _ = loaded if loaded is not None else database.get_all_servants()
+    runner.run('database.get_all_politicians', n, database.get_all_politicians)
+
+    for chart in (utils.create_education_distribution_chart, utils.create_yearly_trends,
+                  utils.create_department_education_heatmap, utils.get_western_education_stats):
+        runner.run(f'utils.{chart.__name__}', n, lambda chart=chart: chart(servants))
+
+    cube = runner.run('CountCube.from_frame', n, lambda: CountCube.from_frame(servants, SERVANT_DIMENSIONS))
+    cube = cube or CountCube.from_frame(servants, SERVANT_DIMENSIONS)
+    departments = list(servants['department'].unique()[:3])
+    runner.run('CountCube.select.education_stats', n,
+               lambda: cube.select(department=departments).education_stats())
+
+    scraper = GovernmentDataScraper()
+    texts = [EDUCATION_TEXTS[i % len(EDUCATION_TEXTS)] for i in range(n)]
+    runner.run('GovernmentDataScraper.parse_education_info', n,
+               lambda: [scraper.parse_education_info(text) for text in texts])
+    run_rosters(runner, n)
+
+    runner.run('data_generator.generate_public_servant_data', n,
+               lambda: data_generator.generate_public_servant_data(n))
+    runner.run('data_generator.generate_politician_data', n,
+               lambda: data_generator.generate_politician_data(n))
+    runner.run('data_generator.generate_family_data', n,
+               lambda: data_generator.generate_family_data(range(1, n + 1)))
+
+    reset_schema()
+    runner.run('database.seed_database', n, lambda: database.seed_database(n_servants=n, n_politicians=n))
+
+    reset_schema()
+    integrator = DataIntegrator()
+    integrator.scraper = scaled_scraper(n)
+    runner.run('DataIntegrator.import_politicians', n, integrator.import_politicians)
+    runner.run('DataIntegrator.import_civil_servants', n, integrator.import_civil_servants)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['name'], r['rows']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path} (ratio > 1 is slower/larger):")
+    for result in results:
+        before = baseline.get((result['name'], result['rows']))
+        if not before:
+            continue
+        ratios = [
+            f"{metric} x{result[metric] / before[metric]:.2f}" if before[metric] else f"{metric} n/a"
+            for metric in ('wall_time_s', 'queries', 'peak_memory_mb')
+        ]
+        print(f"{result['name']:<45} {result['rows']:>9,} rows  " + '  '.join(ratios))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    scratch = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        scratch.close()
+        os.environ['DATABASE_URL'] = f'sqlite:///{scratch.name}'
+
+    # models.py reads DATABASE_URL on import, so project modules load only after it is set
+    sys.path.insert(0, ROOT)
+    from models import engine
+
+    runner = BenchmarkRunner(QueryCounter(engine), only=args.only)
+    warm_up()
+    try:
+        for n in sizes:
+            run_size(runner, n)
+    finally:
+        engine.dispose()
+        if scratch:
+            os.unlink(scratch.name)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'database': engine.dialect.name,
+            'sizes': sizes,
+        },
+        'results': runner.results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['git_revision'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        print_comparison(runner.results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""Bulk loading of hand-curated CSV or Parquet files.
+
+Files are streamed in chunks, each chunk is validated with vectorized checks,
+family rows are attached to their officer or politician by natural key
+(name plus department or party), and valid rows go through RecordEncoder and
+insert_frame like the seeders. Invalid rows, and rows whose natural key is
+already stored, are skipped and reported with their row number; every inserted
+row carries the upload's import_batch id.
+"""
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+import pandas as pd
+from sqlalchemy import select
+
+from database import insert_frame
+from lookups import RecordEncoder
+from models import (
+    PublicServant, Politician, PoliticianFamily, OfficerFamily, Department, Party, SessionLocal
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+MIN_JOINING_YEAR = 1947
+
+
+@dataclass(frozen=True)
+class Parent:
+    """How a family row names its parent: name column, group column and the parent's group lookup"""
+    fk_column: str
+    model: type
+    name_column: str
+    group_column: str
+    group_model: type
+    group_fk: str
+    # Parent columns copied onto each family row, such as the partition key
+    inherited: tuple = ()
+
+
+@dataclass(frozen=True)
+class UploadKind:
+    model: type
+    columns: tuple
+    required: tuple
+    # Encoded columns that identify a stored row; rows matching one are not inserted again
+    key: tuple
+    parent: Parent = None
+
+
+PERSON_COLUMNS = ('education_location', 'university', 'degree_level')
+FAMILY_COLUMNS = ('name', 'relation_type', *PERSON_COLUMNS)
+
+UPLOAD_KINDS = {
+    'servants': UploadKind(
+        PublicServant, ('name', 'department', 'joining_year', *PERSON_COLUMNS), ('name', 'department'),
+        ('name', 'department_id')
+    ),
+    'politicians': UploadKind(
+        Politician, ('name', 'party', 'position', *PERSON_COLUMNS), ('name', 'party'), ('name', 'party_id')
+    ),
+    'officer_family': UploadKind(
+        OfficerFamily, ('officer_name', 'department', *FAMILY_COLUMNS), ('officer_name', 'department', 'name'),
+        ('name', 'officer_id'),
+        Parent('officer_id', PublicServant, 'officer_name', 'department', Department, 'department_id',
+               ('joining_year',))
+    ),
+    'politician_family': UploadKind(
+        PoliticianFamily, ('politician_name', 'party', *FAMILY_COLUMNS), ('politician_name', 'party', 'name'),
+        ('name', 'politician_id'),
+        Parent('politician_id', Politician, 'politician_name', 'party', Party, 'party_id')
+    ),
+}
+
+
+@dataclass
+class ImportReport:
+    batch: str
+    kind: str
+    rows: int = 0
+    inserted: int = 0
+    # One dict per problem: row (1-based, header excluded), column and message
+    errors: list = field(default_factory=list)
+
+    def errors_frame(self):
+        return pd.DataFrame(self.errors, columns=['row', 'column', 'message'])
+
+
+def new_batch_id(kind):
+    return f"{kind}-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def read_chunks(source, name=None, chunk_size=CHUNK_SIZE):
+    """Yield (DataFrame of strings, total rows or None) from a CSV or Parquet path or file object"""
+    name = (name or getattr(source, 'name', None) or str(source)).lower()
+    if name.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        total = parquet.metadata.num_rows
+        for batch in parquet.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas().astype('string'), total
+    elif name.endswith('.csv'):
+        for chunk in pd.read_csv(source, chunksize=chunk_size, dtype='string', keep_default_na=False,
+                                 skipinitialspace=True):
+            yield chunk, None
+    else:
+        raise ValueError(f"Unsupported file type for {name}; upload a .csv or .parquet file")
+
+
+def validate_chunk(chunk, kind, required=None):
+    """Strip values and return (cleaned chunk, boolean mask of valid rows, list of errors)"""
+    spec = UPLOAD_KINDS[kind]
+    required = required or spec.required
+    chunk = chunk.reindex(columns=list(spec.columns)).astype('string').apply(lambda column: column.str.strip())
+    chunk = chunk.mask(chunk.eq('').fillna(False))
+    errors = []
+
+    def flag(mask, column, message):
+        for row in chunk.index[mask]:
+            errors.append({'row': int(row) + 1, 'column': column, 'message': message})
+
+    for column in required:
+        flag(chunk[column].isna(), column, 'required value is missing')
+
+    if 'joining_year' in chunk.columns:
+        years = pd.to_numeric(chunk['joining_year'], errors='coerce')
+        given = chunk['joining_year'].notna()
+        flag(given & years.isna(), 'joining_year', 'not a number')
+        out_of_range = given & years.notna() & (
+            (years % 1 != 0) | (years < MIN_JOINING_YEAR) | (years > date.today().year)
+        )
+        flag(out_of_range, 'joining_year', f'must be a whole year between {MIN_JOINING_YEAR} and {date.today().year}')
+        chunk['joining_year'] = years.where(~out_of_range).astype('Int64')
+
+    invalid = chunk.index.isin([error['row'] - 1 for error in errors])
+    return chunk, pd.Series(~invalid, index=chunk.index), errors
+
+
+def resolve_parents(db, chunk, parent):
+    """Map each row's (name, group) to its parent; returns the parent id and inherited columns, and the errors"""
+    names = chunk[parent.name_column].dropna().unique().tolist()
+    inherited = [getattr(parent.model, column) for column in parent.inherited]
+    candidates = db.execute(
+        select(parent.model.id, parent.model.name, parent.group_model.name, *inherited)
+        .join(parent.group_model, getattr(parent.model, parent.group_fk) == parent.group_model.id)
+        .where(parent.model.name.in_(names))
+    ).all()
+    ids = pd.DataFrame(candidates, columns=[parent.fk_column, parent.name_column, parent.group_column,
+                                            *parent.inherited])
+    counts = ids.groupby([parent.name_column, parent.group_column]).size()
+    ids = ids.drop_duplicates([parent.name_column, parent.group_column], keep=False)
+
+    keys = pd.MultiIndex.from_frame(chunk[[parent.name_column, parent.group_column]].astype(object))
+    parents = pd.DataFrame(
+        ids.set_index([parent.name_column, parent.group_column]).reindex(keys).to_numpy(),
+        index=chunk.index, columns=[parent.fk_column, *parent.inherited]
+    ).astype('Int64')
+    matches = pd.Series(counts.reindex(keys).fillna(0).to_numpy(), index=chunk.index)
+
+    errors = []
+    label = parent.model.__tablename__.rstrip('s').replace('_', ' ')
+    for row in chunk.index[matches == 0]:
+        errors.append({'row': int(row) + 1, 'column': parent.name_column,
+                       'message': f'no {label} with this name in {parent.group_column} {chunk.at[row, parent.group_column]}'})
+    for row in chunk.index[matches > 1]:
+        errors.append({'row': int(row) + 1, 'column': parent.name_column,
+                       'message': f'{int(matches[row])} matching {label}s; names must be unique per {parent.group_column}'})
+    return parents, errors
+
+
+def drop_stored(db, rows, spec):
+    """Drop encoded rows whose spec.key is already stored or repeats an earlier row; returns (rows, errors)"""
+    key = list(spec.key)
+    stored = pd.DataFrame(db.execute(
+        select(*[getattr(spec.model, column) for column in key])
+        .where(spec.model.name.in_(rows['name'].dropna().unique().tolist()))
+    ).all(), columns=key)
+    keys = pd.MultiIndex.from_frame(rows[key].astype(object))
+    is_stored = keys.isin(pd.MultiIndex.from_frame(stored.astype(object)))
+    repeated = ~is_stored & keys.duplicated()
+
+    errors = []
+    described = ' and '.join(column.removesuffix('_id').replace('_', ' ') for column in key)
+    for row in rows.index[is_stored]:
+        errors.append({'row': int(row) + 1, 'column': 'name', 'message': f'already stored with the same {described}'})
+    for row in rows.index[repeated]:
+        errors.append({'row': int(row) + 1, 'column': 'name',
+                       'message': f'repeats an earlier row with the same {described}'})
+    return rows[~(is_stored | repeated)], errors
+
+
+def import_file(source, kind, name=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Stream a CSV or Parquet file of one upload kind into the database in a single transaction.
+
+    progress, if given, is called as progress(rows_read, total_rows) after each
+    chunk; total_rows is None for CSV files. Returns an ImportReport.
+    """
+    from partitioning import PARTITION_KEY, is_partitioned
+
+    spec = UPLOAD_KINDS[kind]
+    report = ImportReport(batch=new_batch_id(kind), kind=kind)
+    db = SessionLocal()
+    try:
+        encoder = RecordEncoder(db)
+        required = spec.required
+        # Rows without a partition key have no partition to go to
+        if PARTITION_KEY in spec.columns and is_partitioned(db.connection(), spec.model.__tablename__):
+            required += (PARTITION_KEY,)
+        for chunk, total in read_chunks(source, name, chunk_size):
+            chunk.index = pd.RangeIndex(report.rows, report.rows + len(chunk))
+            report.rows += len(chunk)
+            missing = [column for column in required if column not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+            chunk, valid, errors = validate_chunk(chunk, kind, required)
+            if spec.parent:
+                parents, parent_errors = resolve_parents(db, chunk[valid], spec.parent)
+                chunk[list(parents.columns)] = parents.reindex(chunk.index)
+                valid &= chunk[spec.parent.fk_column].notna()
+                errors += parent_errors
+
+            rows = chunk[valid].assign(import_batch=report.batch)
+            if spec.parent:
+                rows = rows.drop(columns=[spec.parent.name_column, spec.parent.group_column])
+            # Earlier chunks are already inserted, so re-imports and repeats across chunks are caught too
+            rows, duplicate_errors = drop_stored(db, encoder.encode_frame(rows), spec)
+            report.errors += errors + duplicate_errors
+            report.inserted += insert_frame(db, spec.model, rows)
+            if progress:
+                progress(report.rows, total)
+        db.commit()
+        logger.info(f"Imported {report.inserted} of {report.rows} {kind} rows as batch {report.batch}")
+        return report
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
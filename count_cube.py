@@ -0,0 +1,104 @@
+"""Dense count cubes for answering sidebar filters without rescanning rows.
+
+A cube holds the number of people for every combination of a few categorical
+dimensions, e.g. department x education_location x degree_level x joining_year.
+Filtering is index selection on the cube and every metric or chart input is a
+sum over its axes. Index 0 of each axis counts missing values, so selecting by
+label excludes them exactly as Series.isin would.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from education_stats import WESTERN_COUNTRIES, category_codes, stats_from_counts
+
+SERVANT_DIMENSIONS = ('department', 'education_location', 'degree_level', 'joining_year')
+POLITICIAN_DIMENSIONS = ('party', 'education_location', 'degree_level')
+
+
+class CountCube:
+    def __init__(self, dimensions, labels, counts):
+        self.dimensions = tuple(dimensions)
+        # labels[axis][0] is None, the slot for missing values
+        self.labels = [list(axis) for axis in labels]
+        self.counts = counts
+
+    @classmethod
+    def from_frame(cls, df, dimensions):
+        """Count every combination of the given columns in one bincount"""
+        codes, labels = zip(*(category_codes(df[dimension]) for dimension in dimensions))
+        labels = [[None, *axis] for axis in labels]
+        shape = tuple(len(axis) for axis in labels)
+        flat = np.ravel_multi_index(codes, shape) if len(df) else np.zeros(0, dtype=np.int64)
+        counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(dimensions, labels, counts)
+
+    def _axis(self, dimension):
+        return self.dimensions.index(dimension)
+
+    def select(self, **selection):
+        """Sub-cube keeping only the given labels of each named dimension"""
+        index = []
+        labels = []
+        for dimension, axis_labels in zip(self.dimensions, self.labels):
+            if dimension in selection:
+                wanted = set(selection[dimension])
+                keep = [0] + [i for i, label in enumerate(axis_labels) if i and label in wanted]
+            else:
+                keep = list(range(len(axis_labels)))
+            index.append(keep)
+            labels.append([axis_labels[i] for i in keep])
+        counts = self.counts[np.ix_(*index)]
+        # The missing slot stays as an axis position but no longer counts when its dimension is filtered
+        for dimension in selection:
+            counts[(slice(None),) * self._axis(dimension) + (0,)] = 0
+        return CountCube(self.dimensions, labels, counts)
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def marginal(self, *dimensions):
+        """Counts summed over every other dimension, axes in the order given"""
+        axes = [self._axis(dimension) for dimension in dimensions]
+        others = tuple(axis for axis in range(self.counts.ndim) if axis not in axes)
+        summed = self.counts.sum(axis=others)
+        order = np.argsort(np.argsort(axes))
+        return np.transpose(summed, order) if summed.ndim > 1 else summed
+
+    def series(self, dimension):
+        """Non-zero counts per label of one dimension, largest first, like value_counts()"""
+        counts = pd.Series(self.marginal(dimension)[1:], index=self.labels[self._axis(dimension)][1:])
+        return counts[counts > 0].sort_values(ascending=False)
+
+    def frame(self, rows, columns):
+        """Two-way count table without missing values or all-zero rows and columns, like groupby().unstack()"""
+        table = pd.DataFrame(
+            self.marginal(rows, columns)[1:, 1:],
+            index=pd.Index(self.labels[self._axis(rows)][1:], name=rows),
+            columns=pd.Index(self.labels[self._axis(columns)][1:], name=columns),
+        )
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0].sort_index()
+
+    def education_stats(self, western_countries=WESTERN_COUNTRIES):
+        """The EducationStats that compute_education_stats would return for the matching rows"""
+        location_axis = self.labels[self._axis('education_location')]
+        degree_axis = self.labels[self._axis('degree_level')]
+        return stats_from_counts(self.marginal('education_location', 'degree_level'),
+                                 location_axis[1:], degree_axis[1:], western_countries)
+
+
+_cubes = {}
+_cubes_lock = threading.Lock()
+
+
+def get_count_cube(name, data_version, build):
+    """The named cube for this data version, building it on first use"""
+    with _cubes_lock:
+        cached = _cubes.get(name)
+        if cached is not None and cached[0] == data_version:
+            return cached[1]
+    cube = build()
+    with _cubes_lock:
+        _cubes[name] = (data_version, cube)
+    return cube
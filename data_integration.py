@@ -1,6 +1,7 @@
 from typing import List, Dict
 from models import PublicServant, Politician, SessionLocal
 from scrapers.government_scraper import GovernmentDataScraper
+from lookups import RecordEncoder
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -16,18 +17,19 @@ class DataIntegrator:
         try:
             # Fetch data from scraper
             politician_data = self.scraper.scrape_mp_data()
+            encoder = RecordEncoder(db)
             
             # Process and insert each politician
             for data in politician_data:
                 education_info = data.pop('education_info', {})
-                politician = Politician(
-                    name=data['name'],
-                    party=data['party'],
-                    position=data['position'],
-                    education_location=education_info.get('education_location', 'India'),
-                    university=education_info.get('university', 'Unknown'),
-                    degree_level=education_info.get('degree_level', 'Unknown')
-                )
+                politician = Politician(**encoder.encode({
+                    'name': data['name'],
+                    'party': data['party'],
+                    'position': data['position'],
+                    'education_location': education_info.get('education_location', 'India'),
+                    'university': education_info.get('university', 'Unknown'),
+                    'degree_level': education_info.get('degree_level', 'Unknown')
+                }))
                 db.add(politician)
                 logger.info(f"Added politician: {data['name']}")
             
@@ -46,18 +48,19 @@ class DataIntegrator:
         try:
             # Fetch data from scraper
             servant_data = self.scraper.scrape_civil_servants()
+            encoder = RecordEncoder(db)
             
             # Process and insert each civil servant
             for data in servant_data:
                 education_info = data.pop('education_info', {})
-                servant = PublicServant(
-                    name=data['name'],
-                    department=data['department'],
-                    joining_year=data['joining_year'],
-                    education_location=education_info.get('education_location', 'India'),
-                    university=education_info.get('university', 'Unknown'),
-                    degree_level=education_info.get('degree_level', 'Unknown')
-                )
+                servant = PublicServant(**encoder.encode({
+                    'name': data['name'],
+                    'department': data['department'],
+                    'joining_year': data['joining_year'],
+                    'education_location': education_info.get('education_location', 'India'),
+                    'university': education_info.get('university', 'Unknown'),
+                    'degree_level': education_info.get('degree_level', 'Unknown')
+                }))
                 db.add(servant)
                 logger.info(f"Added civil servant: {data['name']}")
             
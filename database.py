@@ -1,10 +1,14 @@
-from models import PublicServant, Politician, PoliticianFamily, OfficerFamily, SessionLocal
+from models import PublicServant, Politician, PoliticianFamily, OfficerFamily, Department, Party, SessionLocal, Base, engine, init_db, TableVersion, VERSIONED_TABLES, touch_table
 from data_generator import generate_public_servant_data, generate_politician_data, generate_family_data
+from normalization import seed_institutions
+from lookups import RecordEncoder, load_lookup_names, decode_frame
+from profiling import instrumented
 import pandas as pd
-from sqlalchemy import and_
+from sqlalchemy import and_, delete, func, inspect, insert, literal, select, union_all
 from sqlalchemy.exc import IntegrityError
 
-def seed_database():
+@instrumented(max_queries=None)
+def seed_database(n_servants=200, n_politicians=50):
     """Seed the database with initial mock data"""
     db = SessionLocal()
 
@@ -12,25 +16,30 @@ def seed_database():
         # Check if database is already seeded
         if db.query(PublicServant).first() is None:
             # Generate and add public servants
-            mock_data = generate_public_servant_data(200)
+            encoder = RecordEncoder(db)
+            mock_data = generate_public_servant_data(n_servants)
             records = mock_data.to_dict('records')
-            servants = [PublicServant(**record) for record in records]
+            servants = [PublicServant(**encoder.encode(record)) for record in records]
             db.bulk_save_objects(servants)
+            # bulk_save_objects skips the flush events that record writes, so bump the versions here
+            touch_table(db, PublicServant.__tablename__)
             db.commit()
 
             # Generate and add politicians
-            politician_data = generate_politician_data(50)
+            politician_data = generate_politician_data(n_politicians)
             politician_records = politician_data.to_dict('records')
-            politicians = [Politician(**record) for record in politician_records]
+            politicians = [Politician(**encoder.encode(record)) for record in politician_records]
             db.bulk_save_objects(politicians)
+            touch_table(db, Politician.__tablename__)
             db.commit()
 
             # Get politician IDs and generate family members
             politician_ids = [p.id for p in db.query(Politician).all()]
             family_data = generate_family_data(politician_ids)
             family_records = family_data.to_dict('records')
-            family_members = [PoliticianFamily(**record) for record in family_records]
+            family_members = [PoliticianFamily(**encoder.encode(record)) for record in family_records]
             db.bulk_save_objects(family_members)
+            touch_table(db, PoliticianFamily.__tablename__)
             db.commit()
 
     except Exception as e:
@@ -39,86 +48,142 @@ def seed_database():
     finally:
         db.close()
 
-def get_all_servants():
-    """Get all public servants with their family members from database"""
+@instrumented
+def is_database_ready():
+    """Check that every table exists without touching any rows"""
+    inspector = inspect(engine)
+    return all(inspector.has_table(table) for table in Base.metadata.tables)
+
+@instrumented(max_queries=None)
+def init_database(seed=True):
+    """Create the schema and optionally seed it; the one-time init step"""
+    init_db()
+    seed_institutions()
+    if seed:
+        seed_database()
+
+def get_data_version():
+    """The person tables' write counters (see models.TableVersion); keys caches derived from the tables.
+
+    Read from table_versions, so writes from the API, manage.py or another
+    dashboard process invalidate this process's caches too.
+    """
     db = SessionLocal()
     try:
-        servants = db.query(PublicServant).all()
-
-        servant_data = [{
-            'id': s.id,
-            'name': s.name,
-            'department': s.department,
-            'joining_year': s.joining_year,
-            'education_location': s.education_location,
-            'university': s.university,
-            'degree_level': s.degree_level
-        } for s in servants]
-
-        family_data = []
-        for s in servants:
-            for fm in s.family_members:
-                family_data.append({
-                    'id': fm.id,
-                    'officer_id': s.id,
-                    'officer_name': s.name,
-                    'name': fm.name,
-                    'relation_type': fm.relation_type,
-                    'education_location': fm.education_location,
-                    'university': fm.university,
-                    'degree_level': fm.degree_level
-                })
+        versions = dict(db.execute(select(TableVersion.table_name, TableVersion.version)).all())
+        return tuple(versions.get(table, 0) for table in VERSIONED_TABLES)
+    finally:
+        db.close()
+
+# Loader queries select lookup ids in place of their names; decode_frame turns them into Categoricals
+SERVANT_COLUMNS = ['id', 'name', 'department', 'joining_year', 'education_location', 'university', 'degree_level']
+SERVANTS_QUERY = select(
+    PublicServant.id, PublicServant.name, PublicServant.department_id, PublicServant.joining_year,
+    PublicServant.education_location_id, PublicServant.institution_id, PublicServant.degree_level_id
+).order_by(PublicServant.id)
 
+OFFICER_FAMILY_COLUMNS = ['id', 'officer_id', 'officer_name', 'name', 'relation_type', 'education_location',
+                          'university', 'degree_level']
+OFFICER_FAMILY_QUERY = select(
+    OfficerFamily.id, OfficerFamily.officer_id, PublicServant.name, OfficerFamily.name,
+    OfficerFamily.relation_type_id, OfficerFamily.education_location_id, OfficerFamily.institution_id,
+    OfficerFamily.degree_level_id
+).join(PublicServant, OfficerFamily.officer_id == PublicServant.id).order_by(OfficerFamily.id)
+
+POLITICIAN_COLUMNS = ['id', 'name', 'party', 'position', 'education_location', 'university', 'degree_level']
+POLITICIANS_QUERY = select(
+    Politician.id, Politician.name, Politician.party_id, Politician.position_id,
+    Politician.education_location_id, Politician.institution_id, Politician.degree_level_id
+).order_by(Politician.id)
+
+POLITICIAN_FAMILY_COLUMNS = ['id', 'politician_id', 'politician_name', 'name', 'relation_type',
+                             'education_location', 'university', 'degree_level']
+POLITICIAN_FAMILY_QUERY = select(
+    PoliticianFamily.id, PoliticianFamily.politician_id, Politician.name, PoliticianFamily.name,
+    PoliticianFamily.relation_type_id, PoliticianFamily.education_location_id, PoliticianFamily.institution_id,
+    PoliticianFamily.degree_level_id
+).join(Politician, PoliticianFamily.politician_id == Politician.id).order_by(PoliticianFamily.id)
+
+def servant_queries(years=None):
+    """SERVANTS_QUERY and OFFICER_FAMILY_QUERY, limited to joining years first..last when given.
+
+    Both tables are filtered on their own joining_year, so when they are
+    partitioned (see partitioning.py) Postgres scans only those years' partitions.
+    """
+    if not years:
+        return SERVANTS_QUERY, OFFICER_FAMILY_QUERY
+    first, last = years
+    return (
+        SERVANTS_QUERY.where(PublicServant.joining_year.between(first, last)),
+        OFFICER_FAMILY_QUERY.where(OfficerFamily.joining_year.between(first, last),
+                                   PublicServant.joining_year.between(first, last))
+    )
+
+@instrumented
+def get_all_servants(years=None):
+    """Get all public servants with their family members from database, optionally for (first, last) joining years"""
+    servants, family = servant_queries(years)
+    db = SessionLocal()
+    try:
+        servant_rows, family_rows = db.execute(servants).all(), db.execute(family).all()
+        # Lookups are read last, so they include every value the rows above can reference
+        names = load_lookup_names(db)
         return (
-            pd.DataFrame(servant_data) if servant_data else pd.DataFrame(),
-            pd.DataFrame(family_data) if family_data else pd.DataFrame()
+            decode_frame(servant_rows, SERVANT_COLUMNS, names),
+            decode_frame(family_rows, OFFICER_FAMILY_COLUMNS, names)
         )
     finally:
         db.close()
 
+@instrumented
 def get_all_politicians():
     """Get all politicians with their family members from database"""
     db = SessionLocal()
     try:
-        # Use distinct to prevent duplicates
-        politicians = db.query(Politician).distinct().all()
-
-        politician_data = [{
-            'id': p.id,  # Include ID for better tracking
-            'name': p.name,
-            'party': p.party,
-            'position': p.position,
-            'education_location': p.education_location,
-            'university': p.university,
-            'degree_level': p.degree_level
-        } for p in politicians]
-
-        family_data = []
-        for p in politicians:
-            for fm in p.family_members:
-                family_data.append({
-                    'id': fm.id,  # Added id field for family members
-                    'politician_id': p.id,  # Include politician ID for relationship
-                    'politician_name': p.name,
-                    'name': fm.name,
-                    'relation_type': fm.relation_type,
-                    'education_location': fm.education_location,
-                    'university': fm.university,
-                    'degree_level': fm.degree_level
-                })
-
+        politician_rows, family_rows = db.execute(POLITICIANS_QUERY).all(), db.execute(POLITICIAN_FAMILY_QUERY).all()
+        # Lookups are read last, so they include every value the rows above can reference
+        names = load_lookup_names(db)
         return (
-            pd.DataFrame(politician_data) if politician_data else pd.DataFrame(),
-            pd.DataFrame(family_data) if family_data else pd.DataFrame()
+            decode_frame(politician_rows, POLITICIAN_COLUMNS, names),
+            decode_frame(family_rows, POLITICIAN_FAMILY_COLUMNS, names)
         )
     finally:
         db.close()
 
+def officer_years(db, officer_ids):
+    """{officer id: joining_year} for the officers in officer_ids, in one query"""
+    if len(officer_ids) == 0:
+        return {}
+    return dict(db.execute(
+        select(PublicServant.id, PublicServant.joining_year)
+        .where(PublicServant.id.in_([int(officer_id) for officer_id in officer_ids]))
+    ).all())
+
+def with_officer_years(db, df):
+    """Officer family rows with joining_year filled from their officers where it is missing"""
+    if 'joining_year' in df.columns and df['joining_year'].notna().all():
+        return df
+    years = df['officer_id'].map(officer_years(db, df['officer_id'].dropna().unique()))
+    given = df['joining_year'] if 'joining_year' in df.columns else years
+    return df.assign(joining_year=given.fillna(years).astype('Int64'))
+
+def insert_frame(db, model, df, chunk_size=10000):
+    """Insert an encoded DataFrame (see RecordEncoder.encode_frame) in executemany batches"""
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        if model is OfficerFamily:
+            # Family rows carry their officer's joining_year (the partition key); one lookup per chunk
+            chunk = with_officer_years(db, chunk)
+        chunk = chunk[[column for column in chunk.columns if column in model.__table__.c]]
+        db.execute(insert(model), chunk.astype(object).where(chunk.notna(), None).to_dict('records'))
+    return len(df)
+
+@instrumented
 def add_servant(data, family_members=None):
     """Add a new public servant with optional family members to database"""
     db = SessionLocal()
     try:
-        servant = PublicServant(**data)
+        servant = PublicServant(**RecordEncoder(db).encode(data))
         db.add(servant)
         db.commit()
         db.refresh(servant)
@@ -133,13 +198,14 @@ def add_servant(data, family_members=None):
     finally:
         db.close()
 
+@instrumented
 def add_politician(data, family_members=None):
     """Add a new politician with optional family members to database"""
     db = SessionLocal()
     try:
         if check_politician_exists(data['name'], data['party']):
             raise ValueError(f"Politician {data['name']} from party {data['party']} already exists.")
-        politician = Politician(**data)
+        politician = Politician(**RecordEncoder(db).encode(data))
         db.add(politician)
         db.commit()
         db.refresh(politician)
@@ -155,16 +221,18 @@ def add_politician(data, family_members=None):
         db.close()
 
 
+@instrumented
 def check_politician_exists(name, party):
     """Check if a politician with given name and party exists"""
     db = SessionLocal()
     try:
-        return db.query(Politician).filter(
-            and_(Politician.name == name, Politician.party == party)
+        return db.query(Politician).join(Party, Politician.party_id == Party.id).filter(
+            and_(Politician.name == name, Party.name == party)
         ).first()
     finally:
         db.close()
 
+@instrumented
 def check_child_exists(politician_id, child_name):
     """Check if a child already exists for the politician"""
     db = SessionLocal()
@@ -178,6 +246,7 @@ def check_child_exists(politician_id, child_name):
     finally:
         db.close()
 
+@instrumented
 def check_officer_child_exists(officer_id, child_name):
     """Check if a child already exists for the officer"""
     db = SessionLocal()
@@ -191,46 +260,44 @@ def check_officer_child_exists(officer_id, child_name):
     finally:
         db.close()
 
+@instrumented
 def delete_politician(politician_id):
-    """Delete a politician and their family members"""
+    """Delete a politician; the database cascades to their family members"""
     db = SessionLocal()
     try:
-        politician = db.query(Politician).filter(Politician.id == politician_id).first()
-        if politician:
-            db.delete(politician)
-            db.commit()
-            return True
-        return False
+        deleted = db.execute(delete(Politician).where(Politician.id == politician_id)).rowcount
+        db.commit()
+        return deleted > 0
     except Exception as e:
         db.rollback()
         raise e
     finally:
         db.close()
 
+@instrumented
 def delete_servant(servant_id):
-    """Delete a public servant"""
+    """Delete a public servant; the database cascades to their family members"""
     db = SessionLocal()
     try:
-        servant = db.query(PublicServant).filter(PublicServant.id == servant_id).first()
-        if servant:
-            db.delete(servant)
-            db.commit()
-            return True
-        return False
+        deleted = db.execute(delete(PublicServant).where(PublicServant.id == servant_id)).rowcount
+        db.commit()
+        return deleted > 0
     except Exception as e:
         db.rollback()
         raise e
     finally:
         db.close()
 
+@instrumented
 def add_children_to_politician(politician_id, family_data):
     """Add new children to an existing politician"""
     db = SessionLocal()
     try:
+        encoder = RecordEncoder(db)
         for child_data in family_data:
             if not check_child_exists(politician_id, child_data['name']):
                 child_data['politician_id'] = politician_id
-                family_member = PoliticianFamily(**child_data)
+                family_member = PoliticianFamily(**encoder.encode(child_data))
                 db.add(family_member)
             else:
                 raise ValueError(f"Child {child_data['name']} already exists for this politician")
@@ -242,14 +309,18 @@ def add_children_to_politician(politician_id, family_data):
     finally:
         db.close()
 
+@instrumented
 def add_children_to_officer(officer_id, family_data):
     """Add new children to an existing officer"""
     db = SessionLocal()
     try:
+        encoder = RecordEncoder(db)
+        joining_year = officer_years(db, [officer_id]).get(officer_id)
         for child_data in family_data:
             if not check_officer_child_exists(officer_id, child_data['name']):
                 child_data['officer_id'] = officer_id
-                family_member = OfficerFamily(**child_data)
+                child_data.setdefault('joining_year', joining_year)
+                family_member = OfficerFamily(**encoder.encode(child_data))
                 db.add(family_member)
             else:
                 raise ValueError(f"Child {child_data['name']} already exists for this officer")
@@ -259,4 +330,88 @@ def add_children_to_officer(officer_id, family_data):
         db.rollback()
         raise e
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+PERSON_MODELS = (PublicServant, Politician, OfficerFamily, PoliticianFamily)
+
+# Filter name -> (column a table needs for the filter to apply, WHERE clause for a value)
+BULK_DELETE_FILTERS = {
+    'import_batch': ('import_batch', lambda model, value: model.import_batch == value),
+    'party': ('party_id', lambda model, value: (
+        model.party_id == select(Party.id).where(Party.name == value).scalar_subquery()
+    )),
+    'department': ('department_id', lambda model, value: (
+        model.department_id == select(Department.id).where(Department.name == value).scalar_subquery()
+    )),
+    # Partitioned tables delete a cohort from its own partition only
+    'joining_year': ('joining_year', lambda model, value: model.joining_year == value),
+}
+
+@instrumented
+def bulk_delete(models=PERSON_MODELS, **filters):
+    """Delete every row matching all filters with one DELETE per table; returns {table: rows deleted}.
+
+    Only tables that have every filtered column are touched, and family rows of
+    deleted parents go by ON DELETE CASCADE, so the counts cover direct matches.
+    """
+    unknown = set(filters) - set(BULK_DELETE_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown bulk delete filters: {', '.join(sorted(unknown))}")
+    filters = {name: value for name, value in filters.items() if value is not None}
+    if not filters:
+        raise ValueError("bulk_delete needs at least one filter")
+
+    db = SessionLocal()
+    try:
+        deleted = {}
+        for model in models:
+            if not all(hasattr(model, BULK_DELETE_FILTERS[name][0]) for name in filters):
+                continue
+            conditions = [BULK_DELETE_FILTERS[name][1](model, value) for name, value in filters.items()]
+            deleted[model.__tablename__] = db.execute(delete(model).where(and_(*conditions))).rowcount
+        db.commit()
+        return deleted
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+# Aggregates the dashboard loads beside the tables
+IMPORT_BATCHES_COLUMNS = ['batch', 'table', 'rows']
+_import_batches = union_all(*[
+    select(model.import_batch.label('batch'), literal(model.__tablename__).label('table'),
+           func.count().label('rows'))
+    .where(model.import_batch.isnot(None))
+    .group_by(model.import_batch)
+    for model in PERSON_MODELS
+]).subquery()
+IMPORT_BATCHES_QUERY = select(_import_batches).order_by(_import_batches.c.batch.desc())
+
+CROSSOVER_COLUMNS = ['politician_name', 'party', 'family_member', 'relation_type', 'servant_id',
+                     'servant_name', 'department', 'joining_year']
+CROSSOVER_QUERY = select(
+    Politician.name, Politician.party_id, PoliticianFamily.name, PoliticianFamily.relation_type_id,
+    PublicServant.id, PublicServant.name, PublicServant.department_id, PublicServant.joining_year
+).join(Politician, PoliticianFamily.politician_id == Politician.id).join(
+    PublicServant, PublicServant.cluster_id == PoliticianFamily.cluster_id
+).order_by(Politician.name, PoliticianFamily.name)
+
+@instrumented
+def get_import_batches():
+    """Rows per import batch and table, newest batch first"""
+    db = SessionLocal()
+    try:
+        return pd.DataFrame(db.execute(IMPORT_BATCHES_QUERY).all(), columns=IMPORT_BATCHES_COLUMNS)
+    finally:
+        db.close()
+
+@instrumented
+def get_politician_children_in_civil_service():
+    """Politicians' family members who were resolved to the same person as a public servant"""
+    db = SessionLocal()
+    try:
+        names = load_lookup_names(db)
+        return decode_frame(db.execute(CROSSOVER_QUERY).all(), CROSSOVER_COLUMNS, names)
+    finally:
+        db.close()
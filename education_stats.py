@@ -0,0 +1,76 @@
+"""Headline education metrics for a frame of people, computed in one pass.
+
+Both dashboard views and utils.get_western_education_stats read their numbers
+from compute_education_stats, so "western educated" means the same thing
+everywhere. Set TRACKER_WESTERN_COUNTRIES to a comma-separated list to change it.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+WESTERN_COUNTRIES = tuple(
+    country.strip()
+    for country in os.getenv('TRACKER_WESTERN_COUNTRIES', 'USA,UK,Canada,Australia,Germany,France').split(',')
+    if country.strip()
+)
+
+
+@dataclass(frozen=True)
+class EducationStats:
+    total: int
+    western: int
+    location_counts: dict
+    top_western_country: str = None
+    top_western_degree: str = None
+
+    @property
+    def western_percentage(self):
+        return self.western / self.total * 100 if self.total else 0.0
+
+    def western_label(self):
+        """Count with its share, as shown in the dashboard metrics"""
+        return f"{self.western} ({self.western_percentage:.1f}%)"
+
+
+def category_codes(column):
+    """Categorical codes and categories for a column, shifted so missing values are code 0"""
+    categorical = column.array if isinstance(column.dtype, pd.CategoricalDtype) else pd.Categorical(column)
+    return np.asarray(categorical.codes, dtype=np.int64) + 1, list(categorical.categories)
+
+
+def compute_education_stats(df, western_countries=WESTERN_COUNTRIES):
+    """Every headline metric from one location x degree count table over categorical codes"""
+    if df.empty:
+        return EducationStats(total=0, western=0, location_counts={})
+
+    location_codes, locations = category_codes(df['education_location'])
+    degree_codes, degrees = category_codes(df['degree_level'])
+    n_degrees = len(degrees) + 1
+    counts = np.bincount(
+        location_codes * n_degrees + degree_codes, minlength=(len(locations) + 1) * n_degrees
+    ).reshape(len(locations) + 1, n_degrees)
+    return stats_from_counts(counts, locations, degrees, western_countries)
+
+
+def stats_from_counts(counts, locations, degrees, western_countries=WESTERN_COUNTRIES):
+    """Metrics from a location x degree count table whose row and column 0 count missing values"""
+    total = int(counts.sum())
+    counts = counts[1:]
+    per_location = counts.sum(axis=1)
+    is_western = np.isin(np.asarray(locations, dtype=object), list(western_countries))
+    western_counts = counts[is_western]
+    western_per_location = western_counts.sum(axis=1)
+    western_per_degree = western_counts.sum(axis=0)[1:]
+    western = int(western_per_location.sum())
+
+    western_locations = np.asarray(locations, dtype=object)[is_western]
+    return EducationStats(
+        total=total,
+        western=western,
+        location_counts={loc: int(n) for loc, n in zip(locations, per_location) if n > 0},
+        top_western_country=western_locations[western_per_location.argmax()] if western else None,
+        top_western_degree=(degrees[western_per_degree.argmax()]
+                            if western_per_degree.size and western_per_degree.max() > 0 else None),
+    )
@@ -0,0 +1,185 @@
+"""Entity resolution across the four person tables.
+
+The same person can be a politician's child and a public servant, or appear
+twice with slightly different spellings. Candidate pairs come only from
+blocks of records sharing a blocking key (normalized surname plus institution
+or joining year, or first name plus institution), never from all N² pairs.
+Names are compared as hashed trigram bitsets, so a whole batch of pairs is
+scored with a few vectorized popcounts. Matched pairs are merged into clusters,
+and every row's cluster_id is written back. "Is this the same person" then
+becomes an indexed equality join on cluster_id.
+
+Run it with `python manage.py resolve`. Rows added afterwards have no
+cluster_id until the next run.
+"""
+import logging
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, literal, null, select, union_all, update
+
+from models import PublicServant, Politician, PoliticianFamily, OfficerFamily, SessionLocal
+from search import trigrams
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_ENTITIES = {
+    'servant': PublicServant,
+    'politician': Politician,
+    'officer_family': OfficerFamily,
+    'politician_family': PoliticianFamily,
+}
+# The person's own joining year per entity; officer_family.joining_year is a copy of the
+# officer's (the partition key), so family members have none of their own to block on
+OWN_JOINING_YEAR = {'servant': PublicServant.joining_year}
+SIGNATURE_WORDS = 4  # 4 x 64 = 256-bit trigram signatures
+MATCH_THRESHOLD = 0.75
+# Keys shared by more records than this (a very common surname at a large university) are skipped
+MAX_BLOCK_SIZE = 200
+
+_WORDS = re.compile(r'[a-z]+')
+
+
+def load_person_records(db):
+    """entity, id, name, institution_id and joining_year of every person row"""
+    query = union_all(*[
+        select(
+            literal(entity).label('entity'), model.id, model.name, model.institution_id,
+            OWN_JOINING_YEAR.get(entity, null()).label('joining_year')
+        )
+        for entity, model in RESOLVED_ENTITIES.items()
+    ])
+    return pd.DataFrame(db.execute(query).all(), columns=['entity', 'id', 'name', 'institution_id', 'joining_year'])
+
+
+def name_parts(names):
+    """(first name, surname) per name: the first and last alphabetic words, lowercased"""
+    words = [_WORDS.findall(str(name).lower()) for name in names]
+    return (
+        pd.Series([w[0] if w else '' for w in words], index=names.index),
+        pd.Series([w[-1] if w else '' for w in words], index=names.index),
+    )
+
+
+def trigram_signatures(names):
+    """(n, SIGNATURE_WORDS) uint64 bitsets with one bit per hashed trigram of each name"""
+    signatures = np.zeros((len(names), SIGNATURE_WORDS), dtype=np.uint64)
+    bits = {}
+    for row, name in enumerate(names):
+        for gram in trigrams(name):
+            if gram not in bits:
+                bit = zlib.crc32(gram.encode()) % (64 * SIGNATURE_WORDS)
+                bits[gram] = (bit // 64, np.uint64(1) << np.uint64(bit % 64))
+            word, mask = bits[gram]
+            signatures[row, word] |= mask
+    return signatures
+
+
+def signature_similarity(signatures, left, right):
+    """Jaccard similarity of the trigram bitsets of each (left, right) pair"""
+    a, b = signatures[left], signatures[right]
+    shared = np.bitwise_count(a & b).sum(axis=1, dtype=np.int64)
+    either = np.bitwise_count(a | b).sum(axis=1, dtype=np.int64)
+    return np.divide(shared, either, out=np.zeros(len(left)), where=either > 0)
+
+
+def blocking_keys(records):
+    """One Series of string keys per blocking rule; missing parts leave the key empty"""
+    first, surname = name_parts(records['name'])
+    institution = records['institution_id'].astype('Int64').astype('string')
+    year = records['joining_year'].astype('Int64').astype('string')
+    return [
+        ('surname+institution', surname + '|' + institution),
+        ('surname+year', surname + '|' + year),
+        ('first+institution', first + '|' + institution),
+    ]
+
+
+def candidate_pairs(keys, max_block_size=MAX_BLOCK_SIZE):
+    """Distinct (left, right) row positions sharing at least one blocking key, left < right"""
+    lefts, rights = [], []
+    for rule, key in keys:
+        codes, uniques = pd.factorize(key, use_na_sentinel=True)
+        valid = codes >= 0
+        positions = np.flatnonzero(valid)
+        codes = codes[valid]
+        order = np.argsort(codes, kind='stable')
+        positions, codes = positions[order], codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        sizes = np.diff(np.r_[starts, len(codes)])
+        skipped = 0
+        for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            if size > max_block_size:
+                skipped += 1
+                continue
+            i, j = np.triu_indices(size, k=1)
+            members = positions[start:start + size]
+            lefts.append(members[i])
+            rights.append(members[j])
+        if skipped:
+            logger.info(f"Skipped {skipped} {rule} blocks larger than {max_block_size}")
+    if not lefts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    pairs = np.unique(np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def connected_components(n, left, right):
+    """Component label per node for the undirected edges (left, right), labelled by their smallest node"""
+    labels = np.arange(n)
+    while True:
+        # Pull each edge's endpoints to their smaller label, then jump pointers until labels are roots
+        smaller = np.minimum(labels[left], labels[right])
+        np.minimum.at(labels, left, smaller)
+        np.minimum.at(labels, right, smaller)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels[left], labels[right]):
+            return labels
+
+
+def resolve_records(records, threshold=MATCH_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """Cluster ids (1..K, in order of first appearance) for a frame of person records"""
+    records = records.reset_index(drop=True)
+    left, right = candidate_pairs(blocking_keys(records), max_block_size)
+    # Hash each distinct name once; repeated names share a signature row
+    name_codes, unique_names = pd.factorize(records['name'].fillna(''))
+    scores = signature_similarity(trigram_signatures(unique_names), name_codes[left], name_codes[right])
+    matched = scores >= threshold
+    logger.info(f"Scored {len(left)} candidate pairs for {len(records)} records; {int(matched.sum())} matched")
+    labels = connected_components(len(records), left[matched], right[matched])
+    return pd.factorize(labels)[0] + 1
+
+
+def resolve_entities(threshold=MATCH_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """Recompute cluster_id for every person row; returns the number of multi-record clusters"""
+    db = SessionLocal()
+    try:
+        records = load_person_records(db)
+        records['cluster_id'] = resolve_records(records, threshold, max_block_size)
+        for entity, model in RESOLVED_ENTITIES.items():
+            rows = records.loc[records['entity'] == entity, ['id', 'cluster_id']]
+            if rows.empty:
+                continue
+            db.execute(
+                update(model.__table__)
+                .where(model.__table__.c.id == bindparam('row_id'))
+                .values(cluster_id=bindparam('cluster'))
+                .execution_options(synchronize_session=False),
+                rows.rename(columns={'id': 'row_id', 'cluster_id': 'cluster'}).astype(int).to_dict('records')
+            )
+        db.commit()
+        sizes = records['cluster_id'].value_counts()
+        merged = int((sizes > 1).sum())
+        logger.info(f"Resolved {len(records)} records into {len(sizes)} clusters, {merged} with several records")
+        return merged
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
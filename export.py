@@ -0,0 +1,245 @@
+"""Streaming file exports of the filtered people together with their family members.
+
+    GET /api/servants/export?format=parquet&department=IAS
+    GET /api/politicians/export?format=xlsx&party=BJP
+
+One query LEFT JOINs each person to their family members, so every output row
+is a person plus one relative, or blank relative columns for people without
+family on record. Rows are fetched EXPORT_CHUNK_ROWS at a time with yield_per,
+decoded per chunk and appended to the file, so memory stays flat however many
+rows match. Parquet needs pyarrow and XLSX needs openpyxl; each is imported
+only when its format is written.
+"""
+import importlib.util
+import io
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+from sqlalchemy import Integer, or_, select
+
+from lookups import load_lookup_names
+from models import PublicServant, Politician, OfficerFamily, PoliticianFamily, SessionLocal
+from profiling import instrumented
+
+EXPORT_CHUNK_ROWS = int(os.getenv('TRACKER_EXPORT_CHUNK_ROWS', '10000'))
+# Excel's sheet size, header row included; longer exports continue on another sheet
+XLSX_MAX_ROWS = 1048576
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    name: str
+    column: object
+    # Lookup (see load_lookup_names) the column's ids decode through
+    lookup: str = None
+
+    @property
+    def is_integer(self):
+        return self.lookup is None and isinstance(self.column.type, Integer)
+
+
+def _person_columns(model, *details):
+    return [
+        ExportColumn('id', model.id),
+        ExportColumn('name', model.name),
+        *details,
+        ExportColumn('education_location', model.education_location_id, 'education_location'),
+        ExportColumn('university', model.institution_id, 'university'),
+        ExportColumn('degree_level', model.degree_level_id, 'degree_level'),
+    ]
+
+
+def _family_columns(model):
+    return [
+        ExportColumn('family_member_id', model.id),
+        ExportColumn('family_member', model.name),
+        ExportColumn('relation_type', model.relation_type_id, 'relation_type'),
+        ExportColumn('family_education_location', model.education_location_id, 'education_location'),
+        ExportColumn('family_university', model.institution_id, 'university'),
+        ExportColumn('family_degree_level', model.degree_level_id, 'degree_level'),
+    ]
+
+
+@dataclass(frozen=True)
+class Export:
+    """People of one model joined to their family members, and the filters the dashboard applies to them"""
+    person: type
+    family: type
+    # Family column holding the person's id
+    parent_key: object
+    columns: list
+    # Filter parameter -> (column, lookup its values are names in, or None for raw values)
+    filters: dict
+
+    @property
+    def tables(self):
+        return [self.person.__tablename__, self.family.__tablename__]
+
+    def query(self, names, filters):
+        """The export SELECT for filters ({parameter: [values]}); a parameter set to None is not filtered"""
+        conditions = []
+        for param, values in filters.items():
+            if values is None:
+                continue
+            if param not in self.filters:
+                raise ValueError(f"Unknown export filter: {param}")
+            column, lookup = self.filters[param]
+            if lookup is None:
+                conditions.append(column.in_(list(values)))
+                continue
+            wanted = {value for value in values if not pd.isna(value) and value != ''}
+            ids = [lookup_id for lookup_id, name in names[lookup].items() if name in wanted]
+            # The dashboard's multiselects list blanks as NaN, and its API links as empty values;
+            # selecting one keeps the rows without a value
+            if len(wanted) < len(values):
+                conditions.append(or_(column.in_(ids), column.is_(None)))
+            else:
+                conditions.append(column.in_(ids))
+        return (
+            select(*[export_column.column for export_column in self.columns])
+            .outerjoin(self.family, self.parent_key == self.person.id)
+            .where(*conditions)
+            .order_by(self.person.id, self.family.id)
+        )
+
+    def frame(self, rows, names):
+        """Decode one chunk of query rows into a DataFrame of names and nullable integers"""
+        df = pd.DataFrame(rows, columns=[export_column.name for export_column in self.columns])
+        for export_column in self.columns:
+            if export_column.lookup:
+                df[export_column.name] = df[export_column.name].map(names[export_column.lookup])
+            elif export_column.is_integer:
+                df[export_column.name] = df[export_column.name].astype('Int64')
+        return df
+
+
+EXPORTS = {
+    'servants': Export(
+        PublicServant, OfficerFamily, OfficerFamily.officer_id,
+        _person_columns(
+            PublicServant,
+            ExportColumn('department', PublicServant.department_id, 'department'),
+            ExportColumn('joining_year', PublicServant.joining_year),
+        ) + _family_columns(OfficerFamily),
+        {
+            'department': (PublicServant.department_id, 'department'),
+            'education_location': (PublicServant.education_location_id, 'education_location'),
+            'degree_level': (PublicServant.degree_level_id, 'degree_level'),
+            'joining_year': (PublicServant.joining_year, None),
+        },
+    ),
+    'politicians': Export(
+        Politician, PoliticianFamily, PoliticianFamily.politician_id,
+        _person_columns(
+            Politician,
+            ExportColumn('party', Politician.party_id, 'party'),
+            ExportColumn('position', Politician.position_id, 'position'),
+        ) + _family_columns(PoliticianFamily),
+        {
+            'party': (Politician.party_id, 'party'),
+            'position': (Politician.position_id, 'position'),
+            'education_location': (Politician.education_location_id, 'education_location'),
+            'degree_level': (Politician.degree_level_id, 'degree_level'),
+        },
+    ),
+}
+
+
+def _write_csv(file, columns, frames):
+    text = io.TextIOWrapper(file, encoding='utf-8', newline='')
+    header = True
+    for df in frames:
+        df.to_csv(text, header=header, index=False)
+        header = False
+    if header:
+        text.write(','.join(column.name for column in columns) + '\n')
+    text.flush()
+    # Leave the caller's file open
+    text.detach()
+
+
+def _write_parquet(file, columns, frames):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column.name, pa.int64() if column.is_integer else pa.string()) for column in columns])
+    # One row group per chunk
+    with pq.ParquetWriter(file, schema) as writer:
+        for df in frames:
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+
+
+def _write_xlsx(file, columns, frames):
+    from openpyxl import Workbook
+
+    # Write-only workbooks spool rows to disk instead of keeping every cell in memory
+    workbook = Workbook(write_only=True)
+    header = [column.name for column in columns]
+    sheet, sheet_rows = None, XLSX_MAX_ROWS
+    for df in frames:
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            if sheet_rows == XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Export {len(workbook.sheetnames) + 1}")
+                sheet.append(header)
+                sheet_rows = 1
+            sheet.append(row)
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet("Export 1").append(header)
+    workbook.save(file)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    extension: str
+    mime_type: str
+    # write(file, columns, frames) appends each DataFrame in frames to the binary file
+    write: object
+    # Optional package the writer imports
+    module: str = None
+
+
+EXPORT_FORMATS = {
+    'csv': ExportFormat('csv', 'text/csv', _write_csv),
+    'parquet': ExportFormat('parquet', 'application/vnd.apache.parquet', _write_parquet, 'pyarrow'),
+    'xlsx': ExportFormat('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                         _write_xlsx, 'openpyxl'),
+}
+
+
+def available_formats():
+    """Export formats whose writer's package is installed"""
+    return [name for name, export_format in EXPORT_FORMATS.items()
+            if export_format.module is None or importlib.util.find_spec(export_format.module)]
+
+
+@instrumented
+def write_export(name, export_format, file, filters=None, progress=None):
+    """Stream the `name` export for filters into a binary file object; returns the number of rows written.
+
+    progress, if given, is called with the running row count after each chunk.
+    """
+    if name not in EXPORTS:
+        raise ValueError(f"Unknown export {name}; choose from {', '.join(EXPORTS)}")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format}; choose from {', '.join(EXPORT_FORMATS)}")
+    export = EXPORTS[name]
+    db = SessionLocal()
+    try:
+        names = load_lookup_names(db)
+        result = db.execute(export.query(names, filters or {}).execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        written = 0
+
+        def frames():
+            nonlocal written
+            for rows in result.partitions():
+                yield export.frame(rows, names)
+                written += len(rows)
+                if progress:
+                    progress(written)
+
+        EXPORT_FORMATS[export_format].write(file, export.columns, frames())
+        return written
+    finally:
+        db.close()
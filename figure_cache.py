@@ -0,0 +1,94 @@
+"""Process-wide cache of built Plotly figures.
+
+Building a chart from a large frame costs far more than the few milliseconds
+Streamlit needs to send it, so charts are keyed by chart name, data version and
+a hash of the filter selection that produced their input. Every session in the
+process shares one cache; unrelated widget changes and switching views reuse the
+figures already built. Entries are evicted least recently used first once their
+serialized size, measured when each figure is cached, passes the memory cap.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from profiling import span
+
+FIGURE_CACHE_MB = float(os.getenv('TRACKER_FIGURE_CACHE_MB', '64'))
+
+
+def filter_hash(filters):
+    """Stable hash of a filter selection; list order does not matter"""
+    canonical = {
+        key: sorted(map(str, value)) if isinstance(value, (list, tuple, set)) else value
+        for key, value in filters.items()
+    }
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class FigureCache:
+    """LRU map of (chart, data version, filter hash) -> figure, capped by serialized size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, name, build, df, data_version, filters):
+        """Return the cached figure for this key, building it from df on a miss.
+
+        The figure is shared between sessions, so callers must not modify it.
+        """
+        key = (name, data_version, filter_hash(filters))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        with span(f"figure_cache.build.{name}"):
+            figure = build(df)
+            # Serialized here only to measure it; the length is what counts against the cap. The
+            # Figure itself is cached because st.plotly_chart re-validates a dict spec into one first
+            size = len(figure.to_json())
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (figure, size)
+                self._bytes += size
+                self._evict()
+        return figure
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self._bytes / 2**20, 3),
+                'max_mb': round(self.max_bytes / 2**20, 3),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+figure_cache = FigureCache(int(FIGURE_CACHE_MB * 2**20))
+
+
+def cached_figure(name, build, df, data_version, filters):
+    """Shorthand for figure_cache.get_or_build on the shared process cache"""
+    return figure_cache.get_or_build(name, build, df, data_version, filters)
@@ -0,0 +1,155 @@
+"""Dictionary encoding for the low-cardinality person columns.
+
+department, party, position, education_location, degree_level and relation_type
+are stored as integer ids into small lookup tables. Writers go through
+RecordEncoder; loaders fetch every lookup in one query and decode whole columns
+into pandas Categoricals.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import literal, select, union_all
+
+from models import Department, Party, Position, EducationLocation, DegreeLevel, RelationType, Institution
+from normalization import InstitutionResolver
+
+logger = logging.getLogger(__name__)
+
+# Record key -> lookup table; the person tables store it as <key>_id
+LOOKUP_MODELS = {
+    'department': Department,
+    'party': Party,
+    'position': Position,
+    'education_location': EducationLocation,
+    'degree_level': DegreeLevel,
+    'relation_type': RelationType,
+}
+
+
+class LookupEncoder:
+    """Maps lookup strings to ids within one session, adding unseen values on first use"""
+
+    def __init__(self, db):
+        self.db = db
+        self._ids = None
+
+    def id_for(self, column, value, add=True):
+        """Return the lookup id for value in the given column, or None if blank (or unseen, with add=False)"""
+        if value is None or (isinstance(value, float) and np.isnan(value)) or not str(value).strip():
+            return None
+        if self._ids is None:
+            self._ids = {lookup: {} for lookup in LOOKUP_MODELS}
+            for lookup, lookup_id, name in self.db.execute(_lookup_query(LOOKUP_MODELS)).all():
+                self._ids[lookup][name] = lookup_id
+        value = str(value).strip()
+        ids = self._ids[column]
+        if value not in ids:
+            if not add:
+                return None
+            entry = LOOKUP_MODELS[column](name=value)
+            self.db.add(entry)
+            self.db.flush()
+            ids[value] = entry.id
+        return ids[value]
+
+    def encode(self, record):
+        """Copy of record with each lookup string replaced by its <column>_id"""
+        record = dict(record)
+        for column in LOOKUP_MODELS:
+            if column in record:
+                record[f'{column}_id'] = self.id_for(column, record.pop(column))
+        return record
+
+
+class RecordEncoder:
+    """Encodes every string-valued foreign key of a person record: lookups and university"""
+
+    def __init__(self, db):
+        self.institutions = InstitutionResolver(db)
+        self.lookups = LookupEncoder(db)
+
+    def encode(self, record):
+        # The university resolver reads education_location as a country hint, so it runs first
+        return self.lookups.encode(self.institutions.encode(record))
+
+    def encode_frame(self, df):
+        """Vectorized encode() for a DataFrame: each distinct value is resolved once"""
+        df = df.copy()
+        if 'university' in df.columns:
+            hints = (df.groupby('university', sort=False)['education_location'].first()
+                     if 'education_location' in df.columns else pd.Series(dtype=object))
+            ids = {u: self.institutions.resolve(u, hints.get(u)) for u in df['university'].dropna().unique()}
+            df['institution_id'] = df.pop('university').map(ids).astype('Int64')
+        for column in LOOKUP_MODELS:
+            if column in df.columns:
+                ids = {v: self.lookups.id_for(column, v) for v in df[column].dropna().unique()}
+                df[f'{column}_id'] = df.pop(column).map(ids).astype('Int64')
+        return df
+
+
+def check_round_trip(db):
+    """Resolve every stored lookup name through a fresh encoder; returns the lookups whose ids did not match.
+
+    Each lookup gets its own encoder, so its first value is the first one after
+    the cache fill. Read-only: the encoders are asked not to add values.
+    """
+    names = load_lookup_names(db)
+    mismatched = []
+    for column in LOOKUP_MODELS:
+        encoder = LookupEncoder(db)
+        if any(encoder.id_for(column, name, add=False) != lookup_id for lookup_id, name in names[column].items()):
+            mismatched.append(column)
+    return mismatched
+
+
+def _lookup_query(models):
+    return union_all(*[
+        select(literal(column).label('column'), model.id, model.name)
+        for column, model in models.items()
+    ])
+
+
+LOOKUP_NAMES_QUERY = _lookup_query({**LOOKUP_MODELS, 'university': Institution})
+
+
+def lookup_names_from_rows(rows):
+    """{column: {id: name}} from the (column, id, name) rows of LOOKUP_NAMES_QUERY"""
+    names = {column: {} for column in [*LOOKUP_MODELS, 'university']}
+    for column, lookup_id, name in rows:
+        names[column][lookup_id] = name
+    return names
+
+
+def load_lookup_names(db):
+    """{column: {id: name}} for every lookup table plus institutions, in one query"""
+    return lookup_names_from_rows(db.execute(LOOKUP_NAMES_QUERY).all())
+
+
+def decode_categorical(ids, names_by_id, column=None):
+    """Decode a column of lookup ids into a Categorical, resolving each distinct id once.
+
+    Ids missing from names_by_id, such as values added after the lookups were
+    read, decode to NaN with a warning.
+    """
+    ordered = sorted(names_by_id)
+    positions = np.full(max(ordered, default=0) + 1, -1)
+    positions[ordered] = np.arange(len(ordered))
+    values = pd.array(ids, dtype='Int64').fillna(-1).to_numpy(dtype=np.int64)
+    known = (values >= 0) & (values < len(positions))
+    codes = np.full(len(values), -1)
+    codes[known] = positions[values[known]]
+    unknown = (values != -1) & (codes == -1)
+    if unknown.any():
+        logger.warning(f"{int(unknown.sum())} {column or 'lookup'} ids not in the lookup table "
+                       f"(such as {sorted(set(values[unknown].tolist()))[:5]}); decoded as blank")
+    return pd.Categorical.from_codes(codes, categories=[names_by_id[i] for i in ordered])
+
+
+def decode_frame(rows, columns, names):
+    """Build a DataFrame from rows whose lookup columns hold ids, decoding them to Categoricals"""
+    df = pd.DataFrame(rows, columns=columns)
+    for column in columns:
+        if column in names:
+            df[column] = decode_categorical(df[column], names[column], column)
+    return df
@@ -0,0 +1,115 @@
+"""Maintenance commands for the tracker database.
+
+Usage:
+    python manage.py init             # create tables and seed mock data
+    python manage.py init --no-seed   # create tables only
+    python manage.py migrate          # upgrade a database created by an older version
+    python manage.py check            # verify that stored lookup values resolve to their own ids
+    python manage.py import servants officers.csv   # bulk load a CSV or Parquet file
+    python manage.py resolve          # cluster records that refer to the same person
+    python manage.py partitions convert              # Postgres: partition servants by joining year
+    python manage.py partitions create               # add partitions for the coming years
+    python manage.py partitions archive --before 1990   # detach older cohorts into the archive schema
+"""
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def cmd_init(args):
+    """Create the schema and seed it with mock data"""
+    from database import init_database
+    init_database(seed=not args.no_seed)
+    logger.info("Database initialized")
+
+
+def cmd_migrate(args):
+    """Bring an existing database up to the current schema"""
+    from migrations import run_migrations
+    run_migrations()
+    logger.info("Migrations complete")
+
+
+def cmd_check(args):
+    """Resolve every stored lookup value through the encoder without writing anything"""
+    from lookups import check_round_trip
+    from models import SessionLocal
+    db = SessionLocal()
+    try:
+        mismatched = check_round_trip(db)
+    finally:
+        db.close()
+    if mismatched:
+        raise SystemExit(f"Lookup values did not round-trip for: {', '.join(mismatched)}")
+    logger.info("Lookup values round-trip")
+
+
+def cmd_import(args):
+    """Bulk load a CSV or Parquet file, printing problems with the skipped rows"""
+    from bulk_import import import_file
+
+    def progress(rows_read, total_rows):
+        logger.info(f"Read {rows_read:,}" + (f" of {total_rows:,}" if total_rows else "") + " rows")
+
+    report = import_file(args.path, args.kind, progress=progress)
+    for error in report.errors:
+        logger.warning(f"Row {error['row']} ({error['column']}): {error['message']}")
+
+
+def cmd_resolve(args):
+    """Recompute cluster_id across the four person tables"""
+    from entity_resolution import resolve_entities
+    resolve_entities(threshold=args.threshold)
+
+
+def cmd_partitions(args):
+    """Convert, extend or archive the yearly partitions of public_servants and officer_family"""
+    from partitioning import archive_partitions, convert_tables, create_partitions
+    if args.action == "convert":
+        convert_tables()
+    elif args.action == "create":
+        create_partitions(through=args.through)
+    elif args.before is None:
+        raise SystemExit("partitions archive needs --before YEAR")
+    else:
+        archive_partitions(args.before)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tracker database maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init_parser = subparsers.add_parser("init", help="Create tables and seed data")
+    init_parser.add_argument("--no-seed", action="store_true", help="Skip seeding mock data")
+    init_parser.set_defaults(func=cmd_init)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Upgrade an existing database")
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    check_parser = subparsers.add_parser("check", help="Verify that stored lookup values resolve to their own ids")
+    check_parser.set_defaults(func=cmd_check)
+
+    import_parser = subparsers.add_parser("import", help="Bulk load a CSV or Parquet file")
+    import_parser.add_argument("kind", choices=["servants", "politicians", "officer_family", "politician_family"])
+    import_parser.add_argument("path", help="Path to a .csv or .parquet file")
+    import_parser.set_defaults(func=cmd_import)
+
+    resolve_parser = subparsers.add_parser("resolve", help="Cluster records that refer to the same person")
+    resolve_parser.add_argument("--threshold", type=float, default=0.75,
+                                help="Minimum trigram similarity of two names in the same block")
+    resolve_parser.set_defaults(func=cmd_resolve)
+
+    partitions_parser = subparsers.add_parser("partitions", help="Manage yearly partitions (PostgreSQL only)")
+    partitions_parser.add_argument("action", choices=["convert", "create", "archive"])
+    partitions_parser.add_argument("--through", type=int, help="Last joining year to create a partition for")
+    partitions_parser.add_argument("--before", type=int, help="Archive partitions for joining years before this")
+    partitions_parser.set_defaults(func=cmd_partitions)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Upgrades for databases created by an older schema.
+
+create_all only creates missing tables, so columns added to existing tables are
+backfilled here. Every step is idempotent; run them with `python manage.py migrate`.
+"""
+import logging
+from functools import partial
+
+from sqlalchemy import inspect, text
+
+from models import PublicServant, Politician, PoliticianFamily, OfficerFamily, SessionLocal, init_db, touch_table
+from normalization import InstitutionResolver, seed_institutions
+from lookups import LOOKUP_MODELS, LookupEncoder
+
+logger = logging.getLogger(__name__)
+
+PERSON_MODELS = (PublicServant, Politician, PoliticianFamily, OfficerFamily)
+
+
+def _backfill(db, model, legacy_column, fk_column, referenced_table, resolve):
+    """Add fk_column beside a legacy string column and fill it from its distinct values"""
+    table = model.__tablename__
+    columns = {column['name'] for column in inspect(db.connection()).get_columns(table)}
+    if legacy_column not in columns:
+        return
+    if fk_column not in columns:
+        db.execute(text(f"ALTER TABLE {table} ADD COLUMN {fk_column} INTEGER REFERENCES {referenced_table}(id)"))
+        if model.__table__.c[fk_column].index:
+            db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{fk_column} ON {table} ({fk_column})"))
+    legacy = db.execute(text(
+        f"SELECT DISTINCT {legacy_column} FROM {table} WHERE {fk_column} IS NULL AND {legacy_column} IS NOT NULL"
+    )).scalars().all()
+    for value in legacy:
+        db.execute(
+            text(f"UPDATE {table} SET {fk_column} = :fk WHERE {legacy_column} = :value AND {fk_column} IS NULL"),
+            {'fk': resolve(value), 'value': value}
+        )
+    # Raw SQL skips the session events that record writes, so bump the table's version here
+    if legacy:
+        touch_table(db, table)
+    logger.info(f"Encoded {len(legacy)} {legacy_column} values in {table}")
+
+
+def migrate_institutions():
+    """Move legacy free-text `university` columns onto institution_id foreign keys"""
+    db = SessionLocal()
+    try:
+        resolver = InstitutionResolver(db)
+        for model in PERSON_MODELS:
+            _backfill(db, model, 'university', 'institution_id', 'institutions', resolver.resolve)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def migrate_lookups():
+    """Move legacy string columns such as `department` onto lookup table ids"""
+    db = SessionLocal()
+    try:
+        encoder = LookupEncoder(db)
+        for model in PERSON_MODELS:
+            for column, lookup in LOOKUP_MODELS.items():
+                if hasattr(model, f'{column}_id'):
+                    _backfill(db, model, column, f'{column}_id', lookup.__tablename__,
+                              partial(encoder.id_for, column))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def _add_indexed_column(db, model, column, sql_type):
+    """Add a nullable, indexed column that create_all cannot add to an existing table"""
+    table = model.__tablename__
+    columns = {existing['name'] for existing in inspect(db.connection()).get_columns(table)}
+    if column not in columns:
+        db.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+        logger.info(f"Added {column} to {table}")
+
+
+def migrate_import_batch():
+    """Add the indexed import_batch column that bulk uploads tag their rows with"""
+    db = SessionLocal()
+    try:
+        for model in PERSON_MODELS:
+            _add_indexed_column(db, model, 'import_batch', 'VARCHAR')
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def migrate_cluster_id():
+    """Add the indexed cluster_id column filled by `python manage.py resolve`"""
+    db = SessionLocal()
+    try:
+        for model in PERSON_MODELS:
+            _add_indexed_column(db, model, 'cluster_id', 'INTEGER')
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def migrate_officer_joining_year():
+    """Copy each officer's joining_year onto their family rows, the key officer_family is partitioned by"""
+    db = SessionLocal()
+    try:
+        columns = {column['name'] for column in inspect(db.connection()).get_columns('officer_family')}
+        if 'joining_year' not in columns:
+            db.execute(text("ALTER TABLE officer_family ADD COLUMN joining_year INTEGER"))
+        filled = db.execute(text(
+            "UPDATE officer_family SET joining_year = "
+            "(SELECT joining_year FROM public_servants WHERE public_servants.id = officer_family.officer_id) "
+            "WHERE joining_year IS NULL"
+        )).rowcount
+        if filled:
+            touch_table(db, OfficerFamily.__tablename__)
+        db.commit()
+        logger.info(f"Set joining_year on {filled} officer_family rows")
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+# Uniform [0, 1) per row; SQLite's random() is a signed 64-bit integer
+RANDOM_UNIT = {
+    'sqlite': "(random() / 18446744073709551616.0 + 0.5)",
+    'postgresql': "random()",
+}
+
+
+def migrate_sample_key():
+    """Add and fill the indexed random sample_key that fast preview samples public_servants by"""
+    db = SessionLocal()
+    try:
+        _add_indexed_column(db, PublicServant, 'sample_key', 'FLOAT')
+        random_unit = RANDOM_UNIT.get(db.get_bind().dialect.name, "random()")
+        filled = db.execute(text(
+            f"UPDATE public_servants SET sample_key = {random_unit} WHERE sample_key IS NULL"
+        )).rowcount
+        if filled:
+            touch_table(db, PublicServant.__tablename__)
+        db.commit()
+        logger.info(f"Set sample_key on {filled} public_servants rows")
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def migrate_parent_indexes():
+    """Index the family tables' parent columns so ON DELETE CASCADE does not scan them"""
+    db = SessionLocal()
+    try:
+        for model, column in ((OfficerFamily, 'officer_id'), (PoliticianFamily, 'politician_id')):
+            table = model.__tablename__
+            db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+MIGRATIONS = [
+    migrate_institutions,
+    migrate_lookups,
+    migrate_import_batch,
+    migrate_parent_indexes,
+    migrate_cluster_id,
+    migrate_officer_joining_year,
+    migrate_sample_key,
+]
+
+
+def run_migrations():
+    """Create any new tables, then apply every migration step in order"""
+    init_db()
+    seed_institutions()
+    for migration in MIGRATIONS:
+        logger.info(f"Running {migration.__name__}")
+        migration()
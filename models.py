@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine, Column, Integer, String, Date, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, DDL, event, select, update, insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import os
+import random
+from datetime import datetime, timezone
 
 # Get database URL from environment variables
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -12,68 +14,229 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Family rows are removed by ON DELETE CASCADE, which SQLite only enforces per connection
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# Fuzzy search relies on pg_trgm; other backends fall back to the in-memory index in search.py
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+def trigram_indexes(table_name, *columns):
+    """GIN trigram indexes for fuzzy search, created on Postgres only"""
+    return tuple(
+        Index(
+            f"ix_{table_name}_{column}_trgm",
+            column,
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql")
+        for column in columns
+    )
+
+class LookupMixin:
+    """Small table of distinct values for a low-cardinality column"""
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+class Department(LookupMixin, Base):
+    __tablename__ = "departments"
+
+class Party(LookupMixin, Base):
+    __tablename__ = "parties"
+
+class Position(LookupMixin, Base):
+    __tablename__ = "positions"
+
+class EducationLocation(LookupMixin, Base):
+    __tablename__ = "education_locations"
+
+class DegreeLevel(LookupMixin, Base):
+    __tablename__ = "degree_levels"
+
+class RelationType(LookupMixin, Base):
+    __tablename__ = "relation_types"
+
+class Institution(Base):
+    __tablename__ = "institutions"
+    __table_args__ = trigram_indexes("institutions", "name")
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
+    country = Column(String)
+
+    aliases = relationship("InstitutionAlias",
+                           back_populates="institution",
+                           cascade="all, delete-orphan")
+
+class InstitutionAlias(Base):
+    __tablename__ = "institution_aliases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Normalized spelling, see normalization.normalize_key
+    alias = Column(String, unique=True, nullable=False)
+    institution_id = Column(Integer, ForeignKey("institutions.id", ondelete="CASCADE"), index=True)
+
+    institution = relationship("Institution", back_populates="aliases")
+
 class PublicServant(Base):
     __tablename__ = "public_servants"
+    __table_args__ = trigram_indexes("public_servants", "name")
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    department = Column(String)
+    department_id = Column(Integer, ForeignKey("departments.id"), index=True)
     joining_year = Column(Integer)
-    education_location = Column(String)
-    university = Column(String)
-    degree_level = Column(String)
+    education_location_id = Column(Integer, ForeignKey("education_locations.id"), index=True)
+    institution_id = Column(Integer, ForeignKey("institutions.id"), index=True)
+    degree_level_id = Column(Integer, ForeignKey("degree_levels.id"))
+    # Set on rows loaded by bulk_import, so a whole upload can be found or removed again
+    import_batch = Column(String, index=True)
+    # Same value for rows entity_resolution judged to be the same person, in any of the four tables
+    cluster_id = Column(Integer, index=True)
+    # Uniform random number; the rows with the smallest keys are the fast preview sample (see sampling.py)
+    sample_key = Column(Float, index=True, default=random.random)
+
+    institution = relationship("Institution")
 
     # One-to-many relationship with family members
     family_members = relationship("OfficerFamily", 
                                 back_populates="officer",
-                                cascade="all, delete-orphan")
+                                cascade="all, delete-orphan",
+                                passive_deletes=True)
 
 class Politician(Base):
     __tablename__ = "politicians"
+    __table_args__ = trigram_indexes("politicians", "name")
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    party = Column(String)
-    position = Column(String)
-    education_location = Column(String)
-    university = Column(String)
-    degree_level = Column(String)
+    party_id = Column(Integer, ForeignKey("parties.id"), index=True)
+    position_id = Column(Integer, ForeignKey("positions.id"))
+    education_location_id = Column(Integer, ForeignKey("education_locations.id"), index=True)
+    institution_id = Column(Integer, ForeignKey("institutions.id"), index=True)
+    degree_level_id = Column(Integer, ForeignKey("degree_levels.id"))
+    import_batch = Column(String, index=True)
+    cluster_id = Column(Integer, index=True)
+
+    institution = relationship("Institution")
 
     # One-to-many relationship with family members
     family_members = relationship("PoliticianFamily", 
                                 back_populates="politician",
-                                cascade="all, delete-orphan")
+                                cascade="all, delete-orphan",
+                                passive_deletes=True)
 
 class PoliticianFamily(Base):
     __tablename__ = "politician_family"
+    __table_args__ = trigram_indexes("politician_family", "name")
 
     id = Column(Integer, primary_key=True, index=True)
-    politician_id = Column(Integer, ForeignKey("politicians.id", ondelete="CASCADE"))
+    politician_id = Column(Integer, ForeignKey("politicians.id", ondelete="CASCADE"), index=True)
     name = Column(String, index=True)
-    relation_type = Column(String)
-    education_location = Column(String)
-    university = Column(String)
-    degree_level = Column(String)
+    relation_type_id = Column(Integer, ForeignKey("relation_types.id"))
+    education_location_id = Column(Integer, ForeignKey("education_locations.id"), index=True)
+    institution_id = Column(Integer, ForeignKey("institutions.id"), index=True)
+    degree_level_id = Column(Integer, ForeignKey("degree_levels.id"))
+    import_batch = Column(String, index=True)
+    cluster_id = Column(Integer, index=True)
+
+    institution = relationship("Institution")
 
     # Many-to-one relationship with politician
     politician = relationship("Politician", back_populates="family_members")
 
 class OfficerFamily(Base):
     __tablename__ = "officer_family"
+    __table_args__ = trigram_indexes("officer_family", "name")
 
     id = Column(Integer, primary_key=True, index=True)
-    officer_id = Column(Integer, ForeignKey("public_servants.id", ondelete="CASCADE"))
+    officer_id = Column(Integer, ForeignKey("public_servants.id", ondelete="CASCADE"), index=True)
+    # The officer's joining_year, kept here so the table can be partitioned alongside public_servants;
+    # writers fill it in bulk (see database.insert_frame and add_children_to_officer)
+    joining_year = Column(Integer)
     name = Column(String, index=True)
-    relation_type = Column(String)
-    education_location = Column(String)
-    university = Column(String)
-    degree_level = Column(String)
+    relation_type_id = Column(Integer, ForeignKey("relation_types.id"))
+    education_location_id = Column(Integer, ForeignKey("education_locations.id"), index=True)
+    institution_id = Column(Integer, ForeignKey("institutions.id"), index=True)
+    degree_level_id = Column(Integer, ForeignKey("degree_levels.id"))
+    import_batch = Column(String, index=True)
+    cluster_id = Column(Integer, index=True)
+
+    institution = relationship("Institution")
 
     # Many-to-one relationship with officer
     officer = relationship("PublicServant", back_populates="family_members")
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+class TableVersion(Base):
+    """Per-table write counter, bumped in the same transaction as every write to a person table"""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True))
+
+VERSIONED_TABLES = ("public_servants", "politicians", "officer_family", "politician_family")
+# Family loaders join their parent's name, and deleting a parent cascades to them
+DEPENDENT_TABLES = {"public_servants": "officer_family", "politicians": "politician_family"}
+
+def touch_table(session, table_name):
+    """Record a write to table_name so this session's commit bumps its version"""
+    if table_name in VERSIONED_TABLES:
+        touched = session.info.setdefault("touched_tables", set())
+        touched.add(table_name)
+        if table_name in DEPENDENT_TABLES:
+            touched.add(DEPENDENT_TABLES[table_name])
+
+@event.listens_for(SessionLocal, "before_flush")
+def _track_flushed_tables(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        touch_table(session, obj.__table__.name)
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _track_executed_tables(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    result = orm_execute_state.invoke_statement()
+    # A statement that matched no rows leaves the table's caches valid
+    if getattr(result, "rowcount", -1) != 0:
+        touch_table(orm_execute_state.session, orm_execute_state.statement.table.name)
+    return result
+
+@event.listens_for(SessionLocal, "before_commit")
+def _bump_table_versions(session):
+    session.flush()
+    touched = session.info.pop("touched_tables", None)
+    if not touched:
+        return
+    connection = session.connection()
+    now = datetime.now(timezone.utc)
+    existing = set(connection.execute(
+        select(TableVersion.table_name).where(TableVersion.table_name.in_(touched))
+    ).scalars())
+    if existing:
+        connection.execute(
+            update(TableVersion)
+            .where(TableVersion.table_name.in_(existing))
+            .values(version=TableVersion.version + 1, updated_at=now)
+        )
+    for table_name in touched - existing:
+        connection.execute(insert(TableVersion).values(table_name=table_name, version=1, updated_at=now))
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_touched_tables(session):
+    session.info.pop("touched_tables", None)
+
+def init_db():
+    """Create all tables. Run once via `python manage.py init`, not on import"""
+    Base.metadata.create_all(bind=engine)
 
 def get_db():
     db = SessionLocal()
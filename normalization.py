@@ -0,0 +1,153 @@
+"""Canonical institution names for free-text university values.
+
+"Oxford University", "University of Oxford" and "Oxford" all normalize to one
+institution, so the four person tables store a small integer institution_id
+instead of whatever spelling was typed or scraped.
+"""
+import re
+from functools import lru_cache
+
+from sqlalchemy import select, update
+
+from models import (
+    Institution, InstitutionAlias, PublicServant, Politician, PoliticianFamily, OfficerFamily, SessionLocal
+)
+
+# Canonical name -> (country, known alternative spellings)
+CANONICAL_INSTITUTIONS = {
+    'Harvard University': ('USA', ['Harvard']),
+    'Massachusetts Institute of Technology': ('USA', ['MIT']),
+    'Stanford University': ('USA', ['Stanford']),
+    'Yale University': ('USA', ['Yale']),
+    'Columbia University': ('USA', ['Columbia']),
+    'University of Oxford': ('UK', ['Oxford University', 'Oxford']),
+    'University of Cambridge': ('UK', ['Cambridge University', 'Cambridge']),
+    'London School of Economics': ('UK', ['LSE', 'London School of Economics and Political Science']),
+    'Imperial College London': ('UK', ['Imperial College']),
+    'University College London': ('UK', ['UCL']),
+    'University of Toronto': ('Canada', ['Toronto University']),
+    'McGill University': ('Canada', ['McGill']),
+    'University of British Columbia': ('Canada', ['UBC']),
+    'University of Melbourne': ('Australia', ['Melbourne University']),
+    'Australian National University': ('Australia', ['ANU']),
+    'IIT Delhi': ('India', ['Indian Institute of Technology Delhi']),
+    'IIT Bombay': ('India', ['Indian Institute of Technology Bombay']),
+    'University of Delhi': ('India', ['Delhi University', 'DU']),
+    'Jawaharlal Nehru University': ('India', ['JNU']),
+    'University of Allahabad': ('India', ['Allahabad University']),
+    "St. Stephen's College": ('India', ['St. Stephens', 'St Stephens College']),
+    'Shri Ram College of Commerce': ('India', ['SRCC']),
+    'Technical University of Munich': ('Germany', ['TU Munich', 'TUM']),
+    'Heidelberg University': ('Germany', ['University of Heidelberg']),
+    'Sciences Po': ('France', ['Sciences Po Paris']),
+    'Sorbonne University': ('France', ['Sorbonne']),
+}
+
+_STOPWORDS = {'the', 'of', 'at', 'and', 'in'}
+_ABBREVIATIONS = {'univ': 'university', 'uni': 'university', 'inst': 'institute', 'coll': 'college', 'st': 'saint'}
+
+
+@lru_cache(maxsize=65536)
+def normalize_key(name):
+    """Spelling-insensitive key: lowercase words, abbreviations expanded, stopwords dropped, sorted"""
+    words = re.findall(r'[a-z0-9]+', name.lower().replace("'", ""))
+    return ' '.join(sorted(_ABBREVIATIONS.get(w, w) for w in words if w not in _STOPWORDS))
+
+
+def clean_name(name):
+    """Collapse whitespace in a raw university string"""
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+_CANONICAL_BY_KEY = {
+    normalize_key(alias): (name, country)
+    for name, (country, aliases) in CANONICAL_INSTITUTIONS.items()
+    for alias in [name, *aliases]
+}
+
+
+class InstitutionResolver:
+    """Maps raw university strings to institution ids within one session.
+
+    Unknown spellings of a canonical institution become new aliases; names not in
+    the dictionary become new institutions. Nothing is committed here.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._ids = None
+
+    def resolve(self, raw, country=None):
+        """Return the institution id for a raw university string, or None if blank"""
+        if raw is None or not str(raw).strip():
+            return None
+        if self._ids is None:
+            self._ids = dict(self.db.execute(select(InstitutionAlias.alias, InstitutionAlias.institution_id)).all())
+        key = normalize_key(str(raw))
+        if key in self._ids:
+            return self._ids[key]
+
+        name, country = _CANONICAL_BY_KEY.get(key, (clean_name(str(raw)), country))
+        canonical_key = normalize_key(name)
+        institution_id = self._ids.get(canonical_key)
+        if institution_id is None:
+            institution = Institution(name=name, country=country)
+            self.db.add(institution)
+            self.db.flush()
+            institution_id = institution.id
+            self._add_alias(canonical_key, institution_id)
+        if key != canonical_key:
+            self._add_alias(key, institution_id)
+        return institution_id
+
+    def encode(self, record):
+        """Copy of record with its 'university' string replaced by an institution_id"""
+        record = dict(record)
+        record['institution_id'] = self.resolve(record.pop('university', None), record.get('education_location'))
+        return record
+
+    def _add_alias(self, key, institution_id):
+        self.db.add(InstitutionAlias(alias=key, institution_id=institution_id))
+        self._ids[key] = institution_id
+
+
+def seed_institutions():
+    """Load the canonical dictionary and its aliases into the database"""
+    db = SessionLocal()
+    try:
+        resolver = InstitutionResolver(db)
+        for name, (country, aliases) in CANONICAL_INSTITUTIONS.items():
+            for alias in [name, *aliases]:
+                resolver.resolve(alias, country)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def merge_institutions(source_id, target_id):
+    """Fold a duplicate institution into another, moving its rows and aliases"""
+    db = SessionLocal()
+    try:
+        source = db.get(Institution, source_id)
+        if source is None:
+            raise ValueError(f"No institution with id {source_id}")
+        if db.get(Institution, target_id) is None:
+            raise ValueError(f"No institution with id {target_id}")
+        for model in (PublicServant, Politician, PoliticianFamily, OfficerFamily):
+            db.execute(update(model).where(model.institution_id == source_id).values(institution_id=target_id))
+        db.execute(
+            update(InstitutionAlias)
+            .where(InstitutionAlias.institution_id == source_id)
+            .values(institution_id=target_id)
+        )
+        db.delete(source)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
@@ -0,0 +1,234 @@
+"""Optional yearly range partitioning of public_servants and officer_family (PostgreSQL only).
+
+    python manage.py partitions convert               # rebuild both tables as partitioned tables
+    python manage.py partitions create                # add partitions up to TRACKER_FUTURE_PARTITIONS years ahead
+    python manage.py partitions archive --before 1990 # detach older cohorts into the archive schema
+
+Every joining year is its own partition, public_servants_y<year> and
+officer_family_y<year>. Family rows carry their officer's joining_year, so
+queries and deletes filtered on joining_year are pruned to that year's
+partition of each table, and ON DELETE CASCADE stays inside the cohort.
+Postgres requires the partition key in a partitioned table's primary key, so
+both keys become (id, joining_year) and officer_family references its officer by
+(officer_id, joining_year). Once converted, servants must have a joining_year.
+"""
+import logging
+import os
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint
+
+from bulk_import import MIN_JOINING_YEAR
+from models import PublicServant, OfficerFamily, SessionLocal, touch_table
+
+logger = logging.getLogger(__name__)
+
+# Parents before children: officer_family's key needs public_servants' (id, joining_year) primary key
+PARTITIONED_MODELS = (PublicServant, OfficerFamily)
+# Child table -> (its parent id column, parent table); the single-column key becomes a composite one
+PARENT_KEYS = {'officer_family': ('officer_id', 'public_servants')}
+PARTITION_KEY = 'joining_year'
+FUTURE_PARTITIONS = int(os.getenv('TRACKER_FUTURE_PARTITIONS', '2'))
+ARCHIVE_SCHEMA = os.getenv('TRACKER_ARCHIVE_SCHEMA', 'archive')
+
+_PARTITION_YEAR = re.compile(r'_y(\d{4})$')
+
+# Family rows take their officer's current joining_year; run before converting so every row has one
+SYNC_FAMILY_YEARS = text(
+    "UPDATE officer_family SET joining_year = public_servants.joining_year FROM public_servants "
+    "WHERE public_servants.id = officer_family.officer_id "
+    "AND officer_family.joining_year IS DISTINCT FROM public_servants.joining_year"
+)
+
+
+def partition_name(table, year):
+    return f"{table}_y{year}"
+
+
+def is_partitioned(connection, table):
+    """Whether table is a partitioned table; always False off Postgres"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {'table': table}
+    ).scalar()
+
+
+def partition_years(connection, table):
+    """Sorted joining years with a partition attached to table"""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table)"
+    ), {'table': table}).scalars()
+    return sorted(int(match.group(1)) for match in map(_PARTITION_YEAR.search, names) if match)
+
+
+def _require_postgres(connection):
+    if connection.dialect.name != 'postgresql':
+        raise ValueError(f"Partitioning needs PostgreSQL; this database is {connection.dialect.name}")
+
+
+def _require_partitioned(connection):
+    _require_postgres(connection)
+    if not is_partitioned(connection, 'public_servants'):
+        raise ValueError("public_servants is not partitioned; run `python manage.py partitions convert` first")
+
+
+def _create_partitions(connection, parent, table, years):
+    for year in years:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, year)} PARTITION OF {parent} "
+            f"FOR VALUES FROM ({year}) TO ({year + 1})"
+        ))
+
+
+def _parent_key_sql(table, parent_table=None):
+    fk_column, parent = PARENT_KEYS[table]
+    return (f"FOREIGN KEY ({fk_column}, {PARTITION_KEY}) REFERENCES {parent_table or parent} (id, {PARTITION_KEY}) "
+            f"ON DELETE CASCADE ON UPDATE CASCADE")
+
+
+def _convert_table(connection, model, years):
+    """Replace one table with a partitioned copy of its rows, keeping its id sequence, indexes and keys"""
+    table = model.__tablename__
+    staging = f"{table}_partitioned"
+    missing = connection.execute(text(f"SELECT count(*) FROM {table} WHERE {PARTITION_KEY} IS NULL")).scalar()
+    if missing:
+        raise ValueError(f"{missing} {table} rows have no {PARTITION_KEY}; fill it in before partitioning")
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}).scalar()
+
+    connection.execute(text(
+        f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ({PARTITION_KEY})"
+    ))
+    _create_partitions(connection, staging, table, years)
+    connection.execute(text(f"INSERT INTO {staging} SELECT * FROM {table}"))
+    if sequence:
+        # The old table owns the id sequence and would drop it along with itself
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {staging}.id"))
+    # CASCADE also drops foreign keys that point at the old table; convert_tables recreates them
+    connection.execute(text(f"DROP TABLE {table} CASCADE"))
+    connection.execute(text(f"ALTER TABLE {staging} RENAME TO {table}"))
+    connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {PARTITION_KEY})"))
+
+    for index in model.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    replaced = PARENT_KEYS.get(table, (None,))[0]
+    for constraint in model.__table__.foreign_key_constraints:
+        if list(constraint.column_keys) != [replaced]:
+            connection.execute(AddConstraint(constraint))
+    if table in PARENT_KEYS:
+        connection.execute(text(f"ALTER TABLE {table} ADD {_parent_key_sql(table)}"))
+    connection.execute(text(f"ANALYZE {table}"))
+    logger.info(f"Partitioned {table} into {len(years)} yearly partitions")
+
+
+def convert_tables(future=FUTURE_PARTITIONS):
+    """Rebuild public_servants and officer_family as tables partitioned by joining_year, in one transaction.
+
+    Partitions cover MIN_JOINING_YEAR (or the earliest stored year) through
+    `future` years from now. Returns False if the tables were already partitioned.
+    """
+    db = SessionLocal()
+    try:
+        connection = db.connection()
+        _require_postgres(connection)
+        if is_partitioned(connection, 'public_servants'):
+            logger.info("public_servants and officer_family are already partitioned")
+            return False
+        connection.execute(text("LOCK TABLE public_servants, officer_family IN ACCESS EXCLUSIVE MODE"))
+        if connection.execute(SYNC_FAMILY_YEARS).rowcount:
+            touch_table(db, OfficerFamily.__tablename__)
+        first, last = connection.execute(
+            text(f"SELECT min({PARTITION_KEY}), max({PARTITION_KEY}) FROM public_servants")
+        ).one()
+        years = range(min(first or MIN_JOINING_YEAR, MIN_JOINING_YEAR),
+                      max(last or 0, date.today().year + future) + 1)
+        for model in PARTITIONED_MODELS:
+            _convert_table(connection, model, years)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def create_partitions(through=None):
+    """Add the missing yearly partitions up to `through` (default: FUTURE_PARTITIONS years from now).
+
+    Archived years below a table's earliest partition are not recreated. Returns
+    {table: [years created]}.
+    """
+    through = through or date.today().year + FUTURE_PARTITIONS
+    db = SessionLocal()
+    try:
+        connection = db.connection()
+        _require_partitioned(connection)
+        created = {}
+        for model in PARTITIONED_MODELS:
+            table = model.__tablename__
+            existing = partition_years(connection, table)
+            missing = [year for year in range(existing[0] if existing else MIN_JOINING_YEAR, through + 1)
+                       if year not in existing]
+            _create_partitions(connection, table, table, missing)
+            created[table] = missing
+            logger.info(f"Created {len(missing)} partitions of {table}")
+        db.commit()
+        return created
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+def archive_partitions(before):
+    """Detach every partition for a joining year before `before` and move it to ARCHIVE_SCHEMA.
+
+    Archived rows leave the dashboard, the API and the loaders but stay
+    queryable as archive.<table>_y<year>; archived family partitions keep a
+    foreign key to their archived servants partition. Returns the archived years.
+    """
+    db = SessionLocal()
+    try:
+        connection = db.connection()
+        _require_partitioned(connection)
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        archived = {}
+        # Children first: a servants partition cannot be detached while family rows still reference it
+        for model in reversed(PARTITIONED_MODELS):
+            table = model.__tablename__
+            archived[table] = [year for year in partition_years(connection, table) if year < before]
+            for year in archived[table]:
+                partition = partition_name(table, year)
+                connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+                if table in PARENT_KEYS:
+                    parent_keys = connection.execute(text(
+                        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:partition) "
+                        "AND confrelid = to_regclass(:parent)"
+                    ), {'partition': partition, 'parent': PARENT_KEYS[table][1]}).scalars().all()
+                    for constraint in parent_keys:
+                        connection.execute(text(f'ALTER TABLE {partition} DROP CONSTRAINT "{constraint}"'))
+                connection.execute(text(f"ALTER TABLE {partition} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            if archived[table]:
+                touch_table(db, table)
+
+        for table, (_, parent) in PARENT_KEYS.items():
+            for year in set(archived[table]) & set(archived[parent]):
+                connection.execute(text(
+                    f"ALTER TABLE {ARCHIVE_SCHEMA}.{partition_name(table, year)} "
+                    f"ADD {_parent_key_sql(table, f'{ARCHIVE_SCHEMA}.{partition_name(parent, year)}')}"
+                ))
+        db.commit()
+        years = sorted(set().union(*archived.values()))
+        logger.info(f"Archived {len(years)} joining years into schema {ARCHIVE_SCHEMA}")
+        return years
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
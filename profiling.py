@@ -0,0 +1,204 @@
+"""Query and timing instrumentation for the database helpers and dashboard hot paths.
+
+Every statement sent through the engine is attributed to the innermost open span.
+database.py helpers open spans through @instrumented and app.py wraps its hot
+paths in span(). Finished spans are aggregated per name, collected into the
+current trace (one per Streamlit rerun) and, with TRACKER_METRICS_LOG=1,
+logged as JSON lines on the "tracker.metrics" logger.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+from sqlalchemy import event
+
+from models import engine
+
+logger = logging.getLogger(__name__)
+metrics_logger = logging.getLogger('tracker.metrics')
+
+# A single call issuing more statements than this is reported as a likely N+1 pattern,
+# unless its span sets its own limit (see instrumented)
+N_PLUS_ONE_THRESHOLD = int(os.getenv('TRACKER_N_PLUS_ONE_THRESHOLD', '20'))
+LOG_METRICS = os.getenv('TRACKER_METRICS_LOG', '0') not in ('', '0')
+
+
+@dataclass
+class Span:
+    name: str
+    started: float
+    depth: int = 0
+    duration: float = 0.0
+    queries: int = 0
+    query_time: float = 0.0
+    rows: int = 0
+    # Statement count above which the span is reported as a likely N+1; None never reports
+    max_queries: int = N_PLUS_ONE_THRESHOLD
+
+
+@dataclass
+class SpanStats:
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    queries: int = 0
+    query_time: float = 0.0
+    rows: int = 0
+
+
+@dataclass
+class Trace:
+    """Spans finished while this trace was current, in completion order"""
+    spans: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _finish_query(conn):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    current = _current_span.get()
+    if current is not None:
+        current.queries += 1
+        current.query_time += elapsed
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; pop its start time here
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_started'):
+        _finish_query(conn)
+
+
+def instrument_engine(target):
+    """Attribute the statements target runs to the current span; async engines pass their sync_engine"""
+    event.listen(target, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(target, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(target, 'handle_error', _handle_error)
+
+
+instrument_engine(engine)
+
+
+def count_rows(result):
+    """Rows in a helper's return value: a DataFrame, a tuple of DataFrames or a list"""
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, tuple) and all(isinstance(part, pd.DataFrame) for part in result):
+        return sum(len(part) for part in result)
+    if isinstance(result, list):
+        return len(result)
+    return 0
+
+
+@contextmanager
+def span(name, max_queries=N_PLUS_ONE_THRESHOLD):
+    """Time a block and attribute the statements it issues; nested spans roll up"""
+    parent = _current_span.get()
+    current = Span(name, time.perf_counter(), depth=parent.depth + 1 if parent else 0, max_queries=max_queries)
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.started
+        _current_span.reset(token)
+        if parent is not None:
+            parent.queries += current.queries
+            parent.query_time += current.query_time
+        _record(current)
+
+
+def instrumented(fn=None, *, max_queries=N_PLUS_ONE_THRESHOLD):
+    """Wrap a database helper in a span named after it, counting the rows it returns.
+
+    Batch jobs whose statement count grows with the data they write, such as
+    seeding, use @instrumented(max_queries=None) to skip the N+1 report.
+    """
+    if fn is None:
+        return functools.partial(instrumented, max_queries=max_queries)
+    name = f"{fn.__module__}.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(name, max_queries) as current:
+            result = fn(*args, **kwargs)
+            current.rows = count_rows(result)
+            return result
+    return wrapper
+
+
+def _record(current):
+    with _stats_lock:
+        stats = _stats.setdefault(current.name, SpanStats())
+        stats.calls += 1
+        stats.total_time += current.duration
+        stats.max_time = max(stats.max_time, current.duration)
+        stats.queries += current.queries
+        stats.query_time += current.query_time
+        stats.rows += current.rows
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(current)
+    if current.max_queries is not None and current.queries > current.max_queries:
+        warning = (f"{current.name} issued {current.queries} queries in one call "
+                   f"(threshold {current.max_queries}); possible N+1 pattern")
+        logger.warning(warning)
+        if trace is not None:
+            trace.warnings.append(warning)
+    if LOG_METRICS:
+        metrics_logger.info(json.dumps({'event': 'span', **asdict(current)}))
+
+
+def begin_trace():
+    """Start collecting spans for the current rerun and return the trace"""
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def trace_frame(trace):
+    """The trace's spans as a DataFrame in milliseconds, for display"""
+    return pd.DataFrame([{
+        'span': '  ' * s.depth + s.name,
+        'ms': round(s.duration * 1000, 2),
+        'queries': s.queries,
+        'query_ms': round(s.query_time * 1000, 2),
+        'rows': s.rows,
+    } for s in trace.spans], columns=['span', 'ms', 'queries', 'query_ms', 'rows'])
+
+
+def get_stats():
+    """Per-span totals since the process started"""
+    with _stats_lock:
+        return {name: asdict(stats) for name, stats in _stats.items()}
+
+
+def export_stats(path):
+    """Write the per-span totals to a JSON file for external collection"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'exported_at': time.time(), 'spans': get_stats()}, f, indent=2)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,99 @@
+"""Uniform samples of public_servants for the dashboard's fast preview mode.
+
+Every servant row gets a uniform random sample_key when it is inserted, and the
+index on that column maintains a bottom-k reservoir: the k rows with the
+smallest keys are a uniform random sample of the whole table. One index range
+scan reads them on any backend, and new rows join the sample as they are
+inserted. With k rows read, every row had probability (k-th smallest key) of
+being included, so counts are scaled up by that fraction. Estimates carry
+95% normal-approximation margins.
+"""
+import math
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+from database import servant_queries, SERVANT_COLUMNS, OFFICER_FAMILY_COLUMNS
+from lookups import load_lookup_names, decode_frame
+from models import PublicServant, SessionLocal
+from profiling import instrumented
+
+SAMPLE_ROWS = int(os.getenv('TRACKER_SAMPLE_ROWS', '20000'))
+CONFIDENCE_Z = 1.96  # 95% intervals
+
+
+@dataclass(frozen=True)
+class Estimate:
+    value: float
+    # Half-width of the 95% confidence interval
+    margin: float
+
+    def label(self, percent=False):
+        if percent:
+            return f"{self.value * 100:.1f}% ± {self.margin * 100:.1f}"
+        return f"≈{self.value:,.0f} ± {self.margin:,.0f}" if self.margin else f"{self.value:,.0f}"
+
+
+@dataclass(frozen=True)
+class ServantSample:
+    servants: pd.DataFrame
+    officer_family: pd.DataFrame
+    # Probability that any one row is in the sample; 1.0 when the sample is the whole table
+    fraction: float
+
+    @property
+    def exact(self):
+        return self.fraction >= 1.0
+
+    def scale(self, counts):
+        """Sample counts (a number, Series or DataFrame) scaled up to estimated table counts"""
+        return counts if self.exact else (counts / self.fraction).round()
+
+    def count_estimate(self, matches):
+        """Estimated number of table rows like the `matches` sampled ones"""
+        if self.exact:
+            return Estimate(matches, 0.0)
+        q = self.fraction
+        return Estimate(matches / q, CONFIDENCE_Z * math.sqrt(matches * (1 - q)) / q)
+
+    def share_estimate(self, matches, total):
+        """Estimated fraction matches / total over the table"""
+        if not total:
+            return Estimate(0.0, 0.0)
+        share = matches / total
+        if self.exact:
+            return Estimate(share, 0.0)
+        return Estimate(share, CONFIDENCE_Z * math.sqrt(share * (1 - share) / total * (1 - self.fraction)))
+
+
+@instrumented
+def load_servant_sample(size=SAMPLE_ROWS, years=None):
+    """The `size` servants with the smallest sample keys, with their family members.
+
+    years limits the sample to (first, last) joining years; the rows read are then
+    a uniform sample of that cohort range, with the same inclusion probability.
+    """
+    servants_query, family_query = servant_queries(years)
+    db = SessionLocal()
+    try:
+        names = load_lookup_names(db)
+        rows = db.execute(
+            servants_query.add_columns(PublicServant.sample_key)
+            .where(PublicServant.sample_key.isnot(None))
+            .order_by(None).order_by(PublicServant.sample_key)
+            .limit(size)
+        ).all()
+        servants = decode_frame(rows, [*SERVANT_COLUMNS, 'sample_key'], names)
+        # Every row's chance of being in the sample is the largest key read, unless the whole table fit
+        fraction = float(servants['sample_key'].max()) if len(servants) >= size else 1.0
+        family = family_query
+        if fraction < 1.0:
+            family = family.where(PublicServant.sample_key <= fraction)
+        return ServantSample(
+            servants=servants.drop(columns='sample_key').sort_values('id', ignore_index=True),
+            officer_family=decode_frame(db.execute(family).all(), OFFICER_FAMILY_COLUMNS, names),
+            fraction=fraction,
+        )
+    finally:
+        db.close()
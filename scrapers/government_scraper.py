@@ -1,8 +1,57 @@
 import trafilatura
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator, Union, BinaryIO
 import json
+import os
 import re
+import urllib.request
+from urllib.parse import urljoin, urlsplit
+from lxml import etree
+
+# Bytes handed to the pull parser at a time when reading a page
+ROSTER_CHUNK_BYTES = 64 * 1024
+
+
+class RosterSource:
+    """Where one site's roster rows are and how to read each field out of a row"""
+
+    def __init__(self, url: str, row: str, fields: Dict[str, str], link: Optional[str] = None,
+                 row_tag: str = 'tr'):
+        self.url = url
+        self.row_tag = row_tag
+        # XPath test a row_tag element must pass to be a roster row, such as sitting in the roster table
+        self.row = etree.XPath(f"boolean({row})")
+        # Field -> XPath from the row to its element; whitespace in the text is collapsed
+        self.fields = {name: etree.XPath(f"normalize-space({path})") for name, path in fields.items()}
+        # XPath from the row to the profile page's href, resolved against url
+        self.link = etree.XPath(f"string({link})") if link else None
+        self._origin = '{0.scheme}://{0.netloc}'.format(urlsplit(url))
+
+    def absolute_url(self, href: str) -> str:
+        """href resolved against the roster page's URL"""
+        # Roster links are nearly all root-relative; urljoin is the slow general case
+        if href.startswith('/') and not href.startswith('//'):
+            return self._origin + href
+        return urljoin(self.url, href)
+
+
+# Selectors match the saved pages in benchmarks/fixtures; update them with the live markup
+ROSTER_SOURCES = {
+    'lok_sabha': RosterSource(
+        url='https://loksabha.nic.in/Members/AlphabeticalList.aspx',
+        row="ancestor::table[@id='members-list']",
+        fields={'name': 'td[2]/a', 'party': 'td[3]', 'constituency': 'td[4]', 'state': 'td[5]'},
+        link='td[2]/a/@href',
+    ),
+    'upsc': RosterSource(
+        url='https://upsc.gov.in/recruitment/civil-list',
+        row="ancestor::table[contains(concat(' ', normalize-space(@class), ' '), ' civil-list ')]",
+        fields={'name': 'td[2]/a', 'department': 'td[3]', 'joining_year': 'td[4]', 'cadre': 'td[5]',
+                'education': 'td[6]'},
+        link='td[2]/a/@href',
+    ),
+}
+
 
 class GovernmentDataScraper:
     """Scraper for collecting data about Indian public servants and politicians"""
@@ -95,6 +144,62 @@ class GovernmentDataScraper:
         ]
         return sample_data
 
+    def iter_roster(self, source: str, chunks: Iterable[bytes], encoding: Optional[str] = None) -> Iterator[Dict[str, str]]:
+        """Yield each roster row of a page, fed in chunks, as soon as its closing tag is parsed
+
+        Rows are dicts of the source's fields plus profile_url. Every parsed row is
+        dropped from the tree once read, so the tree stays small however long the
+        page is; libxml2 still buffers the raw page bytes until the parse ends.
+        Bytes are decoded as `encoding` when given, overriding the page's own
+        <meta charset>; otherwise the page's declaration is used, and libxml2
+        falls back to latin-1 for pages with none, which garbles Devanagari names.
+        """
+        config = ROSTER_SOURCES[source]
+        parser = etree.HTMLPullParser(events=('end',), tag=config.row_tag, encoding=encoding)
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from self._roster_rows(config, parser)
+        parser.close()
+        yield from self._roster_rows(config, parser)
+
+    def _roster_rows(self, config: RosterSource, parser) -> Iterator[Dict[str, str]]:
+        for _, row in parser.read_events():
+            if config.row(row):
+                record = {name: path(row) for name, path in config.fields.items()}
+                # Header rows use <th>, so they have no name cell
+                if record.get('name'):
+                    if config.link is not None:
+                        href = config.link(row)
+                        record['profile_url'] = config.absolute_url(href) if href else None
+                    yield record
+            row.clear(keep_tail=False)
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+    def iter_roster_page(self, source: str, page: Union[str, os.PathLike, BinaryIO, None] = None,
+                         chunk_size: int = ROSTER_CHUNK_BYTES, encoding: Optional[str] = None) -> Iterator[Dict[str, str]]:
+        """iter_roster over a saved page (path or binary file), or the source's live roster by default.
+
+        The live page is decoded with the charset of its Content-Type header when it names one;
+        saved pages use `encoding` if given, or their own <meta charset>.
+        """
+        if page is None:
+            with urllib.request.urlopen(ROSTER_SOURCES[source].url, timeout=30) as response:
+                yield from self.iter_roster(source, iter(lambda: response.read(chunk_size), b''),
+                                            response.headers.get_content_charset() or encoding)
+        elif isinstance(page, (str, os.PathLike)):
+            with open(page, 'rb') as f:
+                yield from self.iter_roster(source, iter(lambda: f.read(chunk_size), b''), encoding)
+        else:
+            yield from self.iter_roster(source, iter(lambda: page.read(chunk_size), b''), encoding)
+
+    def iter_profile_links(self, source: str, page: Union[str, os.PathLike, BinaryIO, None] = None,
+                           encoding: Optional[str] = None) -> Iterator[str]:
+        """Profile page URLs from a roster page, in page order"""
+        for record in self.iter_roster_page(source, page, encoding=encoding):
+            if record.get('profile_url'):
+                yield record['profile_url']
+
     def save_to_json(self, data: List[Dict], filename: str):
         """Save scraped data to JSON file"""
         with open(filename, 'w', encoding='utf-8') as f:
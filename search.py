@@ -0,0 +1,311 @@
+"""Fuzzy and typeahead search over names and universities in all four tables.
+
+Universities are matched on the canonical institution name. Postgres answers
+queries with the pg_trgm indexes declared in models.py. SQLite
+databases and DataFrame snapshots use SearchIndex, an in-memory trigram index.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, literal, select, union_all
+
+from database import get_data_version
+from models import PublicServant, Politician, PoliticianFamily, OfficerFamily, Institution, SessionLocal, engine
+
+SEARCH_ENTITIES = {
+    'servant': PublicServant,
+    'politician': Politician,
+    'officer_family': OfficerFamily,
+    'politician_family': PoliticianFamily,
+}
+RESULT_COLUMNS = ['entity', 'id', 'name', 'university', 'score']
+
+_WORD_SPLIT = re.compile(r'[^0-9a-z]+')
+
+
+def trigrams(text, prefix=False):
+    """Split text into pg_trgm style trigrams: lowercased words padded with spaces.
+
+    With prefix=True the last word gets no trailing pad, so a partially typed
+    word still matches the start of a longer one.
+    """
+    words = [w for w in _WORD_SPLIT.split(str(text).lower()) if w]
+    grams = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if prefix and i == len(words) - 1 else f"  {word} "
+        grams.update(padded[j:j + 3] for j in range(len(padded) - 2))
+    return grams
+
+
+def _empty_results():
+    return pd.DataFrame(columns=RESULT_COLUMNS)
+
+
+def _contains(sorted_ids, candidates):
+    """Boolean mask of the candidates present in a sorted id array"""
+    if not len(sorted_ids):
+        return np.zeros(len(candidates), dtype=bool)
+    found = np.searchsorted(sorted_ids, candidates)
+    return sorted_ids[np.minimum(found, len(sorted_ids) - 1)] == candidates
+
+
+class TrigramIndex:
+    """Inverted trigram index over a fixed list of distinct strings"""
+
+    def __init__(self, values):
+        self.values = list(values)
+        postings = {}
+        sizes = np.zeros(len(self.values), dtype=np.int32)
+        for position, value in enumerate(self.values):
+            grams = trigrams(value)
+            sizes[position] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.sizes = sizes
+        self.postings = {}
+        self.complements = {}
+        everything = np.arange(len(self.values), dtype=np.int32)
+        for gram, ids in postings.items():
+            ids = np.asarray(ids, dtype=np.int32)
+            if len(ids) * 2 > len(self.values):
+                # Store trigrams shared by most values (e.g. "uni") as the values lacking them
+                self.complements[gram] = np.setdiff1d(everything, ids, assume_unique=True)
+            else:
+                self.postings[gram] = ids
+
+    def match(self, query, prefix=False, threshold=0.3):
+        """Return (positions, scores) of the values scoring at least threshold against query.
+
+        prefix=False scores with pg_trgm similarity (shared / union of trigrams).
+        prefix=True mostly weighs the share of the query's trigrams found, like
+        word_similarity, with a little similarity mixed in so exact matches rank first.
+        """
+        grams = trigrams(query, prefix=prefix)
+        hits = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+        misses = [self.complements[gram] for gram in grams if gram in self.complements]
+        # Either score needs at least this many shared trigrams, so a match must appear
+        # in one of the shortest len(hits) - needed + 1 posting lists
+        required = max(1, int(np.ceil(threshold * len(grams))))
+        needed = required - len(misses)
+        if required > len(hits) + len(misses):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        seeds = hits[:len(hits) - needed + 1] if needed > 0 else None
+        if seeds is not None and sum(len(postings) for postings in seeds) * 16 < len(self.values):
+            # Few candidates: probe the sorted posting lists for each of them
+            candidates = np.unique(np.concatenate(seeds))
+            shared = np.full(len(candidates), len(misses), dtype=np.int32)
+            for postings in hits:
+                shared += _contains(postings, candidates)
+            for complement in misses:
+                shared -= _contains(complement, candidates)
+        else:
+            # Common trigrams: counting over every value is cheaper
+            counts = np.full(len(self.values), len(misses), dtype=np.int16)
+            for postings in hits:
+                counts[postings] += 1
+            for complement in misses:
+                counts[complement] -= 1
+            candidates = np.flatnonzero(counts >= required)
+            shared = counts[candidates]
+        similarity = shared / (len(grams) + self.sizes[candidates] - shared)
+        scores = 0.9 * shared / len(grams) + 0.1 * similarity if prefix else similarity
+        keep = scores >= threshold
+        return candidates[keep], scores[keep]
+
+
+class SearchIndex:
+    """In-memory search over (entity, id, name, university) records"""
+
+    def __init__(self, records):
+        self.records = records.reset_index(drop=True)
+        n = len(self.records)
+        codes, values = pd.factorize(pd.concat([self.records['name'], self.records['university']]))
+        # Missing names/universities get code -1, which indexes the zero appended to scores
+        self.name_codes = codes[:n]
+        self.university_codes = codes[n:]
+        self.index = TrigramIndex(values)
+        # CSR layout of value -> rows, so a few matched values touch only their own rows
+        order = np.argsort(codes, kind='stable')
+        self.value_rows = order % max(n, 1)
+        self.value_offsets = np.searchsorted(codes[order], np.arange(len(values) + 1))
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Build from a mapping of entity name to a DataFrame with id/name/university columns"""
+        parts = [
+            df[['id', 'name', 'university']].assign(entity=entity)
+            for entity, df in frames.items() if not df.empty
+        ]
+        if not parts:
+            return cls(pd.DataFrame(columns=['entity', 'id', 'name', 'university']))
+        return cls(pd.concat(parts, ignore_index=True))
+
+    def search(self, query, limit=20, entities=None, prefix=True, threshold=0.5):
+        """Return the best matching records as a DataFrame, best first"""
+        if not str(query).strip() or self.records.empty:
+            return _empty_results()
+        positions, scores = self.index.match(query, prefix=prefix, threshold=threshold)
+        if not len(positions):
+            return _empty_results()
+        value_scores = np.zeros(len(self.index.values) + 1)
+        value_scores[positions] = scores
+        rows = self._rows_for(positions)
+        if rows is None:
+            rows = np.arange(len(self.records))
+        row_scores = np.maximum(value_scores[self.name_codes[rows]], value_scores[self.university_codes[rows]])
+        if entities:
+            row_scores[~self.records['entity'].iloc[rows].isin(entities).to_numpy()] = 0.0
+        keep = row_scores >= threshold
+        rows, row_scores = rows[keep], row_scores[keep]
+        matched = np.arange(len(rows))
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-row_scores[matched], limit - 1)[:limit]]
+        matched = matched[np.argsort(-row_scores[matched], kind='stable')]
+        results = self.records.iloc[rows[matched]].assign(score=row_scores[matched])
+        return results[RESULT_COLUMNS].reset_index(drop=True)
+
+    def _rows_for(self, positions):
+        """Distinct rows whose name or university is one of the given values, or None if
+        that is a large share of all rows and scanning everything is cheaper"""
+        starts = self.value_offsets[positions]
+        lengths = self.value_offsets[positions + 1] - starts
+        total = int(lengths.sum())
+        if total * 4 > len(self.records):
+            return None
+        within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.unique(self.value_rows[np.repeat(starts, lengths) + within])
+
+
+def find_similar_universities(universities, threshold=0.5):
+    """Pairs of distinct university names similar enough to be the same institution"""
+    names = pd.Series(universities).dropna().unique()
+    index = TrigramIndex(names)
+    pairs = []
+    for i, name in enumerate(names):
+        positions, scores = index.match(name, threshold=threshold)
+        for j, score in zip(positions, scores):
+            if j > i:
+                pairs.append({'university': name, 'similar_to': names[j], 'score': score})
+    return pd.DataFrame(pairs, columns=['university', 'similar_to', 'score']).sort_values(
+        'score', ascending=False, ignore_index=True
+    )
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def load_search_records():
+    """Load (entity, id, name, university) for every row in the four tables"""
+    db = SessionLocal()
+    try:
+        parts = [
+            select(literal(entity).label('entity'), model.id, model.name, Institution.name)
+            .outerjoin(Institution, model.institution_id == Institution.id)
+            for entity, model in SEARCH_ENTITIES.items()
+        ]
+        rows = db.execute(union_all(*parts)).all()
+        return pd.DataFrame(rows, columns=['entity', 'id', 'name', 'university'])
+    finally:
+        db.close()
+
+
+def get_search_index():
+    """Return the process-wide in-memory index, rebuilding it when the tables' versions change
+
+    Keyed on get_data_version(), so writes from other processes are picked up and
+    commits to unrelated tables don't force a rebuild.
+    """
+    global _default_index
+    version = get_data_version()
+    with _default_index_lock:
+        if _default_index is None or _default_index[0] != version:
+            _default_index = (version, SearchIndex(load_search_records()))
+        return _default_index[1]
+
+
+def invalidate_search_index():
+    """Drop the in-memory index so the next search rebuilds it"""
+    global _default_index
+    with _default_index_lock:
+        _default_index = None
+
+
+def _search_postgres(query, limit, entities, prefix, threshold):
+    if prefix:
+        def similarity(column):
+            return func.word_similarity(query, column)
+
+        def matches(column):
+            return literal(query).op('<%')(column)
+    else:
+        def similarity(column):
+            return func.similarity(column, query)
+
+        def matches(column):
+            return column.op('%')(query)
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            select(func.set_config(
+                'pg_trgm.word_similarity_threshold' if prefix else 'pg_trgm.similarity_threshold',
+                str(threshold), True
+            ))
+        )
+        # Match institutions once; the small table is scanned via its own trigram index
+        institutions = (
+            select(Institution.id, Institution.name, similarity(Institution.name).label('score'))
+            .where(matches(Institution.name))
+            .cte('matched_institutions')
+        )
+        parts = []
+        for entity, model in SEARCH_ENTITIES.items():
+            if entities and entity not in entities:
+                continue
+            by_name = (
+                select(literal(entity).label('entity'), model.id, model.name,
+                       Institution.name.label('university'), similarity(model.name).label('score'))
+                .outerjoin(Institution, model.institution_id == Institution.id)
+                .where(matches(model.name))
+                .order_by(similarity(model.name).desc())
+                .limit(limit)
+                .subquery()
+            )
+            by_university = (
+                select(literal(entity).label('entity'), model.id, model.name,
+                       institutions.c.name.label('university'), institutions.c.score)
+                .join(institutions, model.institution_id == institutions.c.id)
+                .order_by(institutions.c.score.desc())
+                .limit(limit)
+                .subquery()
+            )
+            parts.extend([select(by_name), select(by_university)])
+        if not parts:
+            return _empty_results()
+        combined = union_all(*parts).subquery()
+        ranked = (
+            select(combined.c.entity, combined.c.id, combined.c.name, combined.c.university,
+                   func.max(combined.c.score).label('score'))
+            .group_by(combined.c.entity, combined.c.id, combined.c.name, combined.c.university)
+            .order_by(func.max(combined.c.score).desc())
+            .limit(limit)
+        )
+        return pd.DataFrame(db.execute(ranked).all(), columns=RESULT_COLUMNS)
+    finally:
+        db.close()
+
+
+def search_people(query, limit=20, entities=None, prefix=True, threshold=0.5):
+    """Search names and universities across all four tables.
+
+    prefix=True scores the query as typeahead input (its last word may be partial).
+    Returns a DataFrame with entity, id, name, university and score, best first.
+    """
+    if not str(query).strip():
+        return _empty_results()
+    if engine.dialect.name == 'postgresql':
+        return _search_postgres(query, limit, entities, prefix, threshold)
+    return get_search_index().search(query, limit=limit, entities=entities, prefix=prefix, threshold=threshold)
@@ -1,11 +1,19 @@
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from education_stats import compute_education_stats
+
 def create_education_distribution_chart(df):
     if df.empty:
         return px.pie(title='No data available')
     location_counts = df['education_location'].value_counts()
+    # Categorical columns also count locations filtered out of df
+    return education_distribution_figure(location_counts[location_counts > 0])
+
+def education_distribution_figure(location_counts):
+    """Pie chart from precomputed counts per education location"""
+    if location_counts.empty:
+        return px.pie(title='No data available')
     fig = px.pie(
         values=location_counts.values,
         names=location_counts.index,
@@ -17,7 +25,13 @@ def create_education_distribution_chart(df):
 def create_yearly_trends(df):
     if df.empty:
         return px.line(title='No data available')
-    yearly_data = df.groupby(['joining_year', 'education_location']).size().unstack(fill_value=0)
+    yearly_data = df.groupby(['joining_year', 'education_location'], observed=True).size().unstack(fill_value=0)
+    return yearly_trends_figure(yearly_data)
+
+def yearly_trends_figure(yearly_data):
+    """Line chart from a joining_year x education_location count table"""
+    if yearly_data.empty:
+        return px.line(title='No data available')
     fig = px.line(
         yearly_data,
         title='Yearly Trends in Educational Background',
@@ -26,8 +40,14 @@ def create_yearly_trends(df):
 
 def create_department_education_heatmap(df):
     if df.empty:
-        return px.imshow(title='No data available')
-    dept_edu = pd.crosstab(df['department'], df['education_location'])
+        return go.Figure(layout={'title': 'No data available'})
+    dept_edu = df.groupby(['department', 'education_location'], observed=True).size().unstack(fill_value=0)
+    return department_heatmap_figure(dept_edu)
+
+def department_heatmap_figure(dept_edu):
+    """Heatmap from a department x education_location count table"""
+    if dept_edu.empty:
+        return go.Figure(layout={'title': 'No data available'})
     fig = px.imshow(
         dept_edu,
         title='Department vs Education Location Distribution',
@@ -36,19 +56,20 @@ def create_department_education_heatmap(df):
     )
     return fig
 
+def build_person_labels(df, detail_column):
+    """Map id -> "name (detail)" in one vectorized pass, for selectbox format_func lookups"""
+    if df.empty:
+        return {}
+    labels = df['name'].astype(str) + ' (' + df[detail_column].astype(str) + ')'
+    return dict(zip(df['id'].tolist(), labels.tolist()))
+
 def get_western_education_stats(df):
-    """Calculate western education statistics with error handling"""
-    western_countries = ['USA', 'UK', 'Canada', 'Australia', 'Germany', 'France']
-    western_educated = df[df['education_location'].isin(western_countries)]
-
-    total_officers = len(df)
-    total_western = len(western_educated)
-
-    stats = {
-        'Total Officers': total_officers,
-        'Western Educated': total_western,
-        'Percentage Western Educated': f"{(total_western / total_officers * 100):.1f}%" if total_officers > 0 else "0.0%",
-        'Top Western Country': western_educated['education_location'].mode().iloc[0] if not western_educated.empty else 'N/A',
-        'Most Common Degree': western_educated['degree_level'].mode().iloc[0] if not western_educated.empty else 'N/A'
+    """Western education statistics as display strings, from the shared statistics engine"""
+    stats = compute_education_stats(df)
+    return {
+        'Total Officers': stats.total,
+        'Western Educated': stats.western,
+        'Percentage Western Educated': f"{stats.western_percentage:.1f}%",
+        'Top Western Country': stats.top_western_country or 'N/A',
+        'Most Common Degree': stats.top_western_degree or 'N/A'
     }
-    return stats
\ No newline at end of file